@@ -21,7 +21,7 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 # 导入自定义模块
 try:
     from llm.clients.aliyun_client import AliyunClient
-    from llm.utils.file_handler import FileHandler
+    from llm.utils.file_handler import get_file_handler
     from docx_processor.template_processor import TemplateProcessor
     from prompts.teaching_design_prompt import get_teaching_design_prompt
     from schemas.teaching_design_schema import validate_teaching_design_data
@@ -53,7 +53,7 @@ app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
 # 初始化组件
 try:
     llm_client = AliyunClient()
-    file_handler = FileHandler()
+    file_handler = get_file_handler()
     template_processor = TemplateProcessor()
     logger.info("组件初始化成功")
 except Exception as e:
@@ -101,9 +101,8 @@ def upload_file():
         if file.filename == '':
             return jsonify({'success': False, 'error': '没有选择文件'})
         
-        # 保存文件
-        file_content = file.read()
-        result = file_handler.save_uploaded_file(file_content, file.filename)
+        # 保存文件（分块写入磁盘，不整体读入内存）
+        result = file_handler.save_uploaded_stream(file.stream, file.filename)
         
         if result['success']:
             file_id = result['file_id']
@@ -154,11 +153,13 @@ def upload():
         
         doc_logger.logger.info(f"📋 PROCESSING PARAMETERS - Template: {template}, AI Model: {ai_model}")
         
-        # 保存文件
-        file_content = file.read()
-        doc_logger.log_upload_start(file.filename, len(file_content))
+        # 保存文件（上传内容已由Werkzeug缓存，取得大小后分块写入磁盘，不整体读入内存）
+        file.stream.seek(0, os.SEEK_END)
+        file_size = file.stream.tell()
+        file.stream.seek(0)
+        doc_logger.log_upload_start(file.filename, file_size)
         
-        result = file_handler.save_uploaded_file(file_content, file.filename)
+        result = file_handler.save_uploaded_stream(file.stream, file.filename)
         
         if result['success']:
             doc_logger.log_upload_complete(True, f"Saved as {result['saved_filename']}")
@@ -187,9 +188,15 @@ def upload():
                 doc_logger.logger.info(f"🤖 STARTING AI PROCESSING - File ID: {file_id}")
                 
                 # 使用Qwen-Long模型和文件上传方式生成教学设计
-                # 上传用户文件到阿里云
-                doc_logger.logger.info("📤 UPLOADING USER FILE TO ALIYUN")
-                user_upload_result = llm_client.upload_file_with_openai_client(uploaded_files[file_id]['file_path'])
+                # 用户文件和模板文件同时上传到阿里云，内容未变的文件复用之前的上传结果
+                doc_logger.logger.info("📤 UPLOADING USER FILE AND TEMPLATE FILE TO ALIYUN")
+                # 模板未修改时直接命中缓存
+                template_path = file_handler.get_template_file_content()['template_path']
+                user_upload_result, template_upload_result = llm_client.upload_files(
+                    [uploaded_files[file_id]['file_path'], template_path],
+                    use_openai_client=True,
+                    cache=True
+                )
                 
                 if not user_upload_result['success']:
                     doc_logger.logger.error(f"❌ USER FILE UPLOAD FAILED: {user_upload_result.get('message', 'Unknown error')}")
@@ -202,11 +209,6 @@ def upload():
                 
                 doc_logger.logger.info(f"✅ USER FILE UPLOADED SUCCESSFULLY - File ID: {user_upload_result['file_id']}")
                 
-                # 上传模板文件到阿里云
-                doc_logger.logger.info("📤 UPLOADING TEMPLATE FILE TO ALIYUN")
-                template_path = file_handler.get_template_file_content()['template_path']
-                template_upload_result = llm_client.upload_file_with_openai_client(template_path)
-                
                 if not template_upload_result['success']:
                     doc_logger.logger.error(f"❌ TEMPLATE FILE UPLOAD FAILED: {template_upload_result.get('message', 'Unknown error')}")
                     uploaded_files[file_id]['status'] = 'failed'
@@ -9,11 +9,7 @@
 """
 
 from .template_processor import TemplateProcessor
-from .placeholder_handler import PlaceholderHandler
-from .template_validator import TemplateValidator
 
 __all__ = [
-    'TemplateProcessor',
-    'PlaceholderHandler',
-    'TemplateValidator'
+    'TemplateProcessor'
 ]
\ No newline at end of file
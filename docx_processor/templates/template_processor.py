@@ -4,33 +4,130 @@
 专门用于处理Word文档模板，包括占位符识别、替换和内容填充。
 """
 
+import io
 import os
 import re
 import logging
-from typing import Dict, List, Any, Optional, Tuple
+from collections import Counter
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, List, Any, Optional, Tuple, Iterator
+from xml.sax.saxutils import escape
+from lxml import etree
 from docx import Document
+from docx.oxml import parse_xml
 from docx.shared import Inches
 from docx.enum.text import WD_PARAGRAPH_ALIGNMENT
+from docx.text.paragraph import Paragraph
 
 logger = logging.getLogger(__name__)
 
+# 可选的第三方正则引擎，接口与 re 一致
+try:
+    import regex
+except ImportError:
+    regex = None
+
+PLACEHOLDER_ENGINES = {'re': re}
+if regex is not None:
+    PLACEHOLDER_ENGINES['regex'] = regex
+DEFAULT_PLACEHOLDER_ENGINE = 'regex' if regex is not None else 're'
+
+# 含有 "{" 的段落才可能包含占位符，由libxml2在C层完成过滤
+_CANDIDATE_PARAGRAPH_XPATH = './w:p[w:r/w:t[contains(., "{")]]'
+_TABLE_HAS_CANDIDATE_XPATH = 'boolean(.//w:r/w:t[contains(., "{")])'
+
+# 文本快速填充无法保持原有语义的字符：换行/制表符需要转换为 w:br/w:tab，控制字符不是合法XML
+_FAST_FILL_UNSAFE_RE = re.compile('[\x00-\x08\x0b-\x1f\t\n]')
+
+# 规范的占位符名称
+_IDENT_RE = re.compile(r'^[a-zA-Z_][a-zA-Z0-9_]*$')
+
+
+
+@lru_cache(maxsize=16)
+def _load_template_bytes(path: str, mtime_ns: int) -> bytes:
+    """读取模板文件原始字节，按 (路径, 修改时间) 缓存，文件被修改后自动失效"""
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+# 手写 __slots__ 以兼容 Python 3.8（dataclass(slots=True) 需要 3.10），
+# __slots__ 与字段默认值冲突，因此所有字段都需显式传入
+@dataclass
+class PlaceholderRef:
+    """占位符位置信息，不适用的索引为 -1"""
+    __slots__ = ('placeholder', 'name', 'kind', 'para_idx', 'run_idx',
+                 'table_idx', 'row_idx', 'cell_idx', 'start', 'end')
+    
+    placeholder: str  # 占位符原文，如 {{name}}
+    name: str  # 占位符名称
+    kind: str  # 类型：text、table、image
+    para_idx: int
+    run_idx: int
+    table_idx: int
+    row_idx: int
+    cell_idx: int
+    start: int
+    end: int
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为字典格式"""
+        if self.kind == 'image':
+            return {
+                'placeholder': self.placeholder,
+                'name': self.name,
+                'paragraph_index': self.para_idx,
+                'type': 'image'
+            }
+        
+        info = {
+            'placeholder': self.placeholder,
+            'name': self.name,
+            'paragraph_index': self.para_idx,
+            'run_index': self.run_idx,
+            'start_pos': self.start,
+            'end_pos': self.end,
+            'type': self.kind
+        }
+        if self.kind == 'table':
+            info.update(table_index=self.table_idx, row_index=self.row_idx, cell_index=self.cell_idx)
+        return info
+
 
 class TemplateProcessor:
     """模板处理器"""
     
-    def __init__(self, template_path: str):
+    # 按图片处理的替换值后缀
+    _IMAGE_SUFFIXES = ('.jpg', '.jpeg', '.png', '.gif', '.bmp', '.webp', '.tiff')
+    
+    def __init__(self, template_path: str, engine: Optional[str] = None):
         """
         初始化模板处理器
         
         Args:
             template_path: 模板文件路径
+            engine: 占位符匹配使用的正则引擎 ('re', 'regex')，默认使用可用的最快引擎
         """
         self.template_path = template_path
         self.document = None
         self.placeholders = {}
         self.placeholder_pattern = r'\{\{([^}]+)\}\}'
         
-        if not os.path.exists(template_path):
+        engine = engine or DEFAULT_PLACEHOLDER_ENGINE
+        if engine not in PLACEHOLDER_ENGINES:
+            raise ValueError(f"不支持的正则引擎: {engine}，可用引擎: {list(PLACEHOLDER_ENGINES)}")
+        self.engine = engine
+        self._placeholder_re = PLACEHOLDER_ENGINES[engine].compile(self.placeholder_pattern)
+        
+        # 占位符查找结果缓存，文档被修改后失效
+        self._placeholders_cache: Optional[Dict[str, List[PlaceholderRef]]] = None
+        self._validation_cache: Optional[Dict[str, Any]] = None
+        self._dirty = True
+        
+        try:
+            self._stat = os.stat(template_path)
+        except FileNotFoundError:
             raise FileNotFoundError(f"模板文件不存在: {template_path}")
         
         self._load_template()
@@ -38,19 +135,114 @@ class TemplateProcessor:
     def _load_template(self):
         """加载模板文档"""
         try:
-            self.document = Document(self.template_path)
+            data = _load_template_bytes(self.template_path, self._stat.st_mtime_ns)
+            self.document = Document(io.BytesIO(data))
             logger.info(f"成功加载模板: {self.template_path}")
         except Exception as e:
             logger.error(f"加载模板失败: {e}")
             raise
     
-    def find_placeholders(self) -> Dict[str, List[Dict[str, Any]]]:
+    def _candidate_paragraphs(self, container) -> List[Tuple[int, Paragraph]]:
+        """
+        用一次XPath查询定位容器中可能含占位符的段落
+        
+        Args:
+            container: 段落容器（文档主体或表格单元格）
+            
+        Returns:
+            List[Tuple[int, Paragraph]]: (段落索引, 段落) 列表，索引与 container.paragraphs 一致
+        """
+        element = container._element
+        hits = element.xpath(_CANDIDATE_PARAGRAPH_XPATH)
+        if not hits:
+            return []
+        
+        hit_set = set(hits)
+        return [(idx, Paragraph(p, container)) for idx, p in enumerate(element.p_lst) if p in hit_set]
+    
+    def _candidate_tables(self):
+        """返回可能含占位符的表格 (表格索引, 表格)"""
+        for table_idx, table in enumerate(self.document.tables):
+            if table._tbl.xpath(_TABLE_HAS_CANDIDATE_XPATH):
+                yield table_idx, table
+    
+    def iter_placeholders(self) -> Iterator[PlaceholderRef]:
+        """
+        逐个产出模板中的占位符，不构建完整的结果列表
+        
+        Yields:
+            PlaceholderRef: 占位符信息，顺序为正文文本、表格、图片
+        """
+        finditer = self._placeholder_re.finditer
+        body_paragraphs = self._candidate_paragraphs(self.document._body)
+        
+        # 在段落中查找占位符
+        for para_idx, paragraph in body_paragraphs:
+            for run_idx, run in enumerate(paragraph.runs):
+                text = run.text
+                if '{{' not in text:
+                    continue
+                for match in finditer(text):
+                    yield PlaceholderRef(match.group(0), match.group(1).strip(), 'text',
+                                         para_idx, run_idx, -1, -1, -1,
+                                         match.start(), match.end())
+        
+        # 在表格中查找占位符
+        for table_idx, table in self._candidate_tables():
+            for row_idx, row in enumerate(table.rows):
+                for cell_idx, cell in enumerate(row.cells):
+                    for para_idx, paragraph in self._candidate_paragraphs(cell):
+                        for run_idx, run in enumerate(paragraph.runs):
+                            text = run.text
+                            if '{{' not in text:
+                                continue
+                            for match in finditer(text):
+                                yield PlaceholderRef(match.group(0), match.group(1).strip(), 'table',
+                                                     para_idx, run_idx, table_idx, row_idx, cell_idx,
+                                                     match.start(), match.end())
+        
+        # 查找图片占位符
+        for para_idx, paragraph in body_paragraphs:
+            text = paragraph.text
+            if '{{' not in text:
+                continue
+            for match in finditer(text):
+                placeholder_name = match.group(1).strip()
+                if 'image' in placeholder_name.lower() or 'picture' in placeholder_name.lower():
+                    yield PlaceholderRef(match.group(0), placeholder_name, 'image',
+                                         para_idx, -1, -1, -1, -1,
+                                         match.start(), match.end())
+    
+    def _check_placeholder(self, placeholder_ref: PlaceholderRef, validation: Dict[str, Any]):
+        """在查找过程中对单个占位符做格式检查"""
+        placeholder_name = placeholder_ref.name
+        
+        # 检查占位符名称是否为空
+        if not placeholder_name.strip():
+            validation['errors'].append(f"空占位符名称: {placeholder_ref.placeholder}")
+        
+        # 检查占位符名称是否包含特殊字符
+        if not _IDENT_RE.match(placeholder_name):
+            validation['warnings'].append(f"占位符名称可能不规范: {placeholder_name}")
+        
+        validation['name_counts'][placeholder_name] += 1
+    
+    def find_placeholders(self, validate: bool = False) -> Dict[str, List[PlaceholderRef]]:
         """
         查找模板中的所有占位符
         
+        Args:
+            validate: 是否在同一次遍历中完成占位符格式检查，结果保存在 self._validation_cache
+        
         Returns:
-            Dict[str, List[Dict[str, Any]]]: 占位符信息
+            Dict[str, List[PlaceholderRef]]: 占位符信息
         """
+        if (not self._dirty and self._placeholders_cache is not None
+                and (not validate or self._validation_cache is not None)):
+            return self._placeholders_cache
+        
+        validation = {'errors': [], 'warnings': [], 'name_counts': Counter()} if validate else None
+        
         placeholders = {
             'text_placeholders': [],
             'table_placeholders': [],
@@ -59,62 +251,15 @@ class TemplateProcessor:
         }
         
         try:
-            # 在段落中查找占位符
-            for para_idx, paragraph in enumerate(self.document.paragraphs):
-                for run_idx, run in enumerate(paragraph.runs):
-                    if run.text:
-                        matches = re.finditer(self.placeholder_pattern, run.text)
-                        for match in matches:
-                            placeholder_info = {
-                                'placeholder': match.group(0),
-                                'name': match.group(1).strip(),
-                                'paragraph_index': para_idx,
-                                'run_index': run_idx,
-                                'start_pos': match.start(),
-                                'end_pos': match.end(),
-                                'type': 'text'
-                            }
-                            placeholders['text_placeholders'].append(placeholder_info)
-            
-            # 在表格中查找占位符
-            for table_idx, table in enumerate(self.document.tables):
-                for row_idx, row in enumerate(table.rows):
-                    for cell_idx, cell in enumerate(row.cells):
-                        for para_idx, paragraph in enumerate(cell.paragraphs):
-                            for run_idx, run in enumerate(paragraph.runs):
-                                if run.text:
-                                    matches = re.finditer(self.placeholder_pattern, run.text)
-                                    for match in matches:
-                                        placeholder_info = {
-                                            'placeholder': match.group(0),
-                                            'name': match.group(1).strip(),
-                                            'table_index': table_idx,
-                                            'row_index': row_idx,
-                                            'cell_index': cell_idx,
-                                            'paragraph_index': para_idx,
-                                            'run_index': run_idx,
-                                            'start_pos': match.start(),
-                                            'end_pos': match.end(),
-                                            'type': 'table'
-                                        }
-                                        placeholders['table_placeholders'].append(placeholder_info)
-            
-            # 查找图片占位符
-            for para_idx, paragraph in enumerate(self.document.paragraphs):
-                if paragraph.text and re.search(self.placeholder_pattern, paragraph.text):
-                    matches = re.finditer(self.placeholder_pattern, paragraph.text)
-                    for match in matches:
-                        placeholder_name = match.group(1).strip()
-                        if 'image' in placeholder_name.lower() or 'picture' in placeholder_name.lower():
-                            placeholder_info = {
-                                'placeholder': match.group(0),
-                                'name': placeholder_name,
-                                'paragraph_index': para_idx,
-                                'type': 'image'
-                            }
-                            placeholders['image_placeholders'].append(placeholder_info)
+            for placeholder_ref in self.iter_placeholders():
+                placeholders[f"{placeholder_ref.kind}_placeholders"].append(placeholder_ref)
+                if validation is not None:
+                    self._check_placeholder(placeholder_ref, validation)
             
             self.placeholders = placeholders
+            self._placeholders_cache = placeholders
+            self._validation_cache = validation
+            self._dirty = False
             logger.info(f"找到占位符: 文本 {len(placeholders['text_placeholders'])} 个, "
                        f"表格 {len(placeholders['table_placeholders'])} 个, "
                        f"图片 {len(placeholders['image_placeholders'])} 个")
@@ -157,29 +302,30 @@ class TemplateProcessor:
         """替换文本占位符"""
         try:
             placeholder_found = False
+            placeholder = f"{{{{{placeholder_name}}}}}"
+            replacement_text = str(replacement_value)
             
             # 在段落中查找并替换
-            for paragraph in self.document.paragraphs:
+            for _, paragraph in self._candidate_paragraphs(self.document._body):
                 for run in paragraph.runs:
                     if run.text:
-                        placeholder = f"{{{{{placeholder_name}}}}}"
                         if placeholder in run.text:
-                            run.text = run.text.replace(placeholder, str(replacement_value))
+                            run.text = run.text.replace(placeholder, replacement_text)
                             placeholder_found = True
             
             # 在表格中查找并替换
-            for table in self.document.tables:
+            for _, table in self._candidate_tables():
                 for row in table.rows:
                     for cell in row.cells:
-                        for paragraph in cell.paragraphs:
+                        for _, paragraph in self._candidate_paragraphs(cell):
                             for run in paragraph.runs:
                                 if run.text:
-                                    placeholder = f"{{{{{placeholder_name}}}}}"
                                     if placeholder in run.text:
-                                        run.text = run.text.replace(placeholder, str(replacement_value))
+                                        run.text = run.text.replace(placeholder, replacement_text)
                                         placeholder_found = True
             
             if placeholder_found:
+                self._dirty = True
                 logger.info(f"替换文本占位符: {placeholder_name}")
                 return True
             else:
@@ -194,17 +340,17 @@ class TemplateProcessor:
         """替换表格占位符"""
         try:
             placeholder_found = False
+            placeholder = f"{{{{{placeholder_name}}}}}"
             
-            for table in self.document.tables:
+            for _, table in self._candidate_tables():
                 for row in table.rows:
                     for cell in row.cells:
-                        for paragraph in cell.paragraphs:
+                        for _, paragraph in self._candidate_paragraphs(cell):
                             for run in paragraph.runs:
                                 if run.text:
-                                    placeholder = f"{{{{{placeholder_name}}}}}"
                                     if placeholder in run.text:
-                                        # 清空单元格内容
-                                        cell.text = ""
+                                        # 原地移除占位符，不重建整个单元格
+                                        run.text = run.text.replace(placeholder, "")
                                         
                                         # 添加表格数据
                                         if replacement_data:
@@ -212,15 +358,14 @@ class TemplateProcessor:
                                             new_table = cell.add_table(rows=len(replacement_data), cols=len(replacement_data[0]))
                                             
                                             # 填充数据
-                                            for i, row_data in enumerate(replacement_data):
-                                                if i < len(new_table.rows):
-                                                    for j, cell_data in enumerate(row_data):
-                                                        if j < len(new_table.rows[i].cells):
-                                                            new_table.rows[i].cells[j].text = str(cell_data)
+                                            for new_row, row_data in zip(new_table.rows, replacement_data):
+                                                for new_cell, cell_data in zip(new_row.cells, row_data):
+                                                    new_cell.text = str(cell_data)
                                         
                                         placeholder_found = True
             
             if placeholder_found:
+                self._dirty = True
                 logger.info(f"替换表格占位符: {placeholder_name}")
                 return True
             else:
@@ -235,14 +380,14 @@ class TemplateProcessor:
         """替换图片占位符"""
         try:
             placeholder_found = False
+            placeholder = f"{{{{{placeholder_name}}}}}"
             
             if not os.path.exists(image_path):
                 logger.error(f"图片文件不存在: {image_path}")
                 return False
             
-            for paragraph in self.document.paragraphs:
+            for _, paragraph in self._candidate_paragraphs(self.document._body):
                 if paragraph.text:
-                    placeholder = f"{{{{{placeholder_name}}}}}"
                     if placeholder in paragraph.text:
                         # 清空段落内容
                         paragraph.clear()
@@ -253,6 +398,7 @@ class TemplateProcessor:
                         placeholder_found = True
             
             if placeholder_found:
+                self._dirty = True
                 logger.info(f"替换图片占位符: {placeholder_name}")
                 return True
             else:
@@ -263,6 +409,77 @@ class TemplateProcessor:
             logger.error(f"替换图片占位符失败: {e}")
             return False
     
+    def _get_replacement_type(self, value: Any) -> str:
+        """确定替换类型"""
+        if isinstance(value, list) and value and isinstance(value[0], list):
+            return 'table'
+        if isinstance(value, str) and value.lower().endswith(self._IMAGE_SUFFIXES):
+            return 'image'
+        return 'text'
+    
+    def _can_fill_fast(self, data: Dict[str, Any]) -> bool:
+        """判断数据是否可以走纯文本快速填充路径"""
+        for value in data.values():
+            if self._get_replacement_type(value) != 'text':
+                return False
+            text = str(value)
+            if text != text.strip() or _FAST_FILL_UNSAFE_RE.search(text):
+                return False
+        return True
+    
+    def fill_template_fast(self, data: Dict[str, Any]) -> bool:
+        """
+        纯文本数据的快速填充
+        
+        将文档主体序列化为XML字符串，一次正则扫描完成所有占位符替换后重新解析，
+        代替逐个占位符遍历段落和表格。数据中包含表格、图片或特殊字符时回退到 fill_template。
+        
+        Args:
+            data: 填充数据
+            
+        Returns:
+            bool: 是否填充成功
+        """
+        if not data or not self._can_fill_fast(data):
+            return self.fill_template(data)
+        
+        try:
+            # 只匹配 data 中键对应的完整 {{key}}（按XML转义后的形式），
+            # 避免未闭合的 "{{" 跨越 </w:t> 等标记吞掉后面的真实占位符
+            replacements = {
+                escape(f"{{{{{key}}}}}"): escape(str(value), {'"': '&quot;'})
+                for key, value in data.items()
+            }
+            token_re = PLACEHOLDER_ENGINES[self.engine].compile(
+                '|'.join(re.escape(token) for token in sorted(replacements, key=len, reverse=True))
+            )
+            found = set()
+            
+            def substitute(match):
+                token = match.group(0)
+                found.add(token)
+                return replacements[token]
+            
+            body = self.document.element.body
+            xml = etree.tostring(body, encoding='unicode')
+            new_xml = token_re.sub(substitute, xml)
+            
+            if found:
+                # 原地替换子节点，保留 body 元素本身以免 python-docx 缓存的引用失效
+                body[:] = list(parse_xml(new_xml))
+                self._dirty = True
+            
+            for key in data:
+                if escape(f"{{{{{key}}}}}") not in found:
+                    logger.warning(f"未找到文本占位符: {key}")
+            
+            logger.info(f"模板填充完成: {len(found)}/{len(data)} 个占位符替换成功")
+            return len(found) == len(data)
+            
+        except Exception as e:
+            logger.error(f"填充模板失败: {e}")
+            return False
+    
     def fill_template(self, data: Dict[str, Any]) -> bool:
         """
         填充模板数据
@@ -274,6 +491,9 @@ class TemplateProcessor:
             bool: 是否填充成功
         """
         try:
+            if data and self._can_fill_fast(data):
+                return self.fill_template_fast(data)
+            
             success_count = 0
             total_count = 0
             
@@ -281,12 +501,7 @@ class TemplateProcessor:
                 total_count += 1
                 
                 # 确定替换类型
-                replacement_type = 'text'
-                if isinstance(value, list) and value and isinstance(value[0], list):
-                    replacement_type = 'table'
-                elif isinstance(value, str) and (value.endswith('.jpg') or value.endswith('.png') or 
-                                               value.endswith('.gif') or value.endswith('.bmp')):
-                    replacement_type = 'image'
+                replacement_type = self._get_replacement_type(value)
                 
                 # 执行替换
                 if self.replace_placeholder(key, value, replacement_type):
@@ -312,11 +527,11 @@ class TemplateProcessor:
         """
         try:
             placeholder_found = False
+            placeholder = f"{{{{{placeholder_name}}}}}"
             
             # 查找占位符位置
-            for para_idx, paragraph in enumerate(self.document.paragraphs):
+            for para_idx, paragraph in self._candidate_paragraphs(self.document._body):
                 if paragraph.text:
-                    placeholder = f"{{{{{placeholder_name}}}}}"
                     if placeholder in paragraph.text:
                         # 替换占位符
                         paragraph.text = paragraph.text.replace(placeholder, "")
@@ -327,6 +542,7 @@ class TemplateProcessor:
                         break
             
             if placeholder_found:
+                self._dirty = True
                 logger.info(f"在占位符后添加内容: {placeholder_name}")
                 return True
             else:
@@ -386,31 +602,18 @@ class TemplateProcessor:
                 'missing_placeholders': []
             }
             
-            # 查找所有占位符
-            placeholders = self.find_placeholders()
-            all_placeholders = []
-            
-            for placeholder_list in placeholders.values():
-                all_placeholders.extend(placeholder_list)
+            # 查找所有占位符，格式检查在同一次遍历中完成
+            placeholders = self.find_placeholders(validate=True)
+            validation = self._validation_cache
             
-            validation_result['placeholder_count'] = len(all_placeholders)
-            
-            # 检查占位符格式
-            for placeholder_info in all_placeholders:
-                placeholder_name = placeholder_info['name']
-                
-                # 检查占位符名称是否为空
-                if not placeholder_name.strip():
-                    validation_result['errors'].append(f"空占位符名称: {placeholder_info['placeholder']}")
-                    validation_result['is_valid'] = False
-                
-                # 检查占位符名称是否包含特殊字符
-                if not re.match(r'^[a-zA-Z_][a-zA-Z0-9_]*$', placeholder_name):
-                    validation_result['warnings'].append(f"占位符名称可能不规范: {placeholder_name}")
+            validation_result['placeholder_count'] = sum(len(pl) for pl in placeholders.values())
+            validation_result['errors'].extend(validation['errors'])
+            validation_result['warnings'].extend(validation['warnings'])
+            if validation['errors']:
+                validation_result['is_valid'] = False
             
             # 检查重复占位符
-            placeholder_names = [p['name'] for p in all_placeholders]
-            duplicate_names = set([name for name in placeholder_names if placeholder_names.count(name) > 1])
+            duplicate_names = {name for name, count in validation['name_counts'].items() if count > 1}
             
             if duplicate_names:
                 validation_result['warnings'].append(f"发现重复占位符: {list(duplicate_names)}")
@@ -434,7 +637,7 @@ class TemplateProcessor:
             
             info = {
                 'template_path': self.template_path,
-                'template_size': os.path.getsize(self.template_path),
+                'template_size': self._stat.st_size,
                 'paragraph_count': len(self.document.paragraphs),
                 'table_count': len(self.document.tables),
                 'placeholder_count': sum(len(pl) for pl in placeholders.values()),
@@ -443,7 +646,11 @@ class TemplateProcessor:
                     'table': len(placeholders['table_placeholders']),
                     'image': len(placeholders['image_placeholders'])
                 },
-                'placeholders': placeholders
+                # 转换为字典，保持返回值可JSON序列化
+                'placeholders': {
+                    category: [ref.to_dict() for ref in refs]
+                    for category, refs in placeholders.items()
+                }
             }
             
             return info
@@ -465,8 +672,8 @@ class TemplateProcessor:
         try:
             # 确保输出目录存在
             output_dir = os.path.dirname(output_path)
-            if output_dir and not os.path.exists(output_dir):
-                os.makedirs(output_dir)
+            if output_dir:
+                os.makedirs(output_dir, exist_ok=True)
             
             self.document.save(output_path)
             logger.info(f"填充后的模板已保存: {output_path}")
@@ -475,6 +682,50 @@ class TemplateProcessor:
         except Exception as e:
             logger.error(f"保存填充后的模板失败: {e}")
             return False
+    
+    @classmethod
+    def save_many(cls, processors: List['TemplateProcessor'], output_paths: List[str]) -> List[bool]:
+        """
+        批量保存多个填充后的模板
+        
+        每个文档先在内存中完成zip打包，再以一次写入落盘，避免zip逐个部件的小块写入。
+        只有一个文档时直接走 save_filled_template。
+        
+        Args:
+            processors: 模板处理器列表
+            output_paths: 与 processors 一一对应的输出文件路径
+            
+        Returns:
+            List[bool]: 每个文档是否保存成功
+        """
+        if len(processors) != len(output_paths):
+            raise ValueError("processors 与 output_paths 数量不一致")
+        
+        if len(processors) == 1:
+            return [processors[0].save_filled_template(output_paths[0])]
+        
+        results = []
+        created_dirs = set()
+        for processor, output_path in zip(processors, output_paths):
+            try:
+                output_dir = os.path.dirname(output_path)
+                if output_dir and output_dir not in created_dirs:
+                    os.makedirs(output_dir, exist_ok=True)
+                    created_dirs.add(output_dir)
+                
+                buffer = io.BytesIO()
+                processor.document.save(buffer)
+                with open(output_path, 'wb') as f:
+                    f.write(buffer.getbuffer())
+                
+                logger.info(f"填充后的模板已保存: {output_path}")
+                results.append(True)
+                
+            except Exception as e:
+                logger.error(f"保存填充后的模板失败: {e}")
+                results.append(False)
+        
+        return results
 
 
 # 使用示例
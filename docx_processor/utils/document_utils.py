@@ -4,26 +4,278 @@
 提供文档处理相关的实用工具函数。
 """
 
+import io
 import os
+import re
+import html
 import logging
-from typing import Dict, List, Any, Optional, Union
-from docx import Document
-from docx.shared import Inches, Pt
-from docx.enum.text import WD_PARAGRAPH_ALIGNMENT
+import zipfile
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from itertools import repeat
+from typing import TYPE_CHECKING, Dict, List, Any, Optional, Union, Iterator, Tuple
+
+# python-docx 与 lxml 按需在函数内导入，仅导入本模块时不加载
+if TYPE_CHECKING:
+    from docx.opc.coreprops import CoreProperties
 
 logger = logging.getLogger(__name__)
 
+# WordprocessingML 命名空间及流式解析用到的标签
+_W_NS = 'http://schemas.openxmlformats.org/wordprocessingml/2006/main'
+_NSMAP = {
+    'w': _W_NS,
+    'wp': 'http://schemas.openxmlformats.org/drawingml/2006/wordprocessingDrawing'
+}
+_W_BODY = f'{{{_W_NS}}}body'
+_W_P = f'{{{_W_NS}}}p'
+_W_PPR = f'{{{_W_NS}}}pPr'
+_W_TBL = f'{{{_W_NS}}}tbl'
+_W_SECTPR = f'{{{_W_NS}}}sectPr'
+_W_R = f'{{{_W_NS}}}r'
+_W_T = f'{{{_W_NS}}}t'
+_W_TAB = f'{{{_W_NS}}}tab'
+_W_BREAKS = (f'{{{_W_NS}}}br', f'{{{_W_NS}}}cr')
+_W_STYLE = f'{{{_W_NS}}}style'
+_WP_EXTENT = f"{{{_NSMAP['wp']}}}extent"
+
+_MAIN_DOCUMENT_PART = 'word/document.xml'
+_STYLES_PART = 'word/styles.xml'
+_CORE_PROPERTIES_PART = 'docProps/core.xml'
+
+# 小于该大小的文件一次性读入内存，避免网络文件系统上的多次小块随机读取
+_PREFETCH_LIMIT = 20 * 1024 * 1024
+
+# 与 python-docx InlineShapes 相同的图片定位规则
+_INLINE_SHAPE_XPATH = '(self::w:p|.//w:p)/w:r/w:drawing/wp:inline'
+
+# 分页符（<w:br w:type="page"/>）计数
+_PAGE_BREAK_XPATH = 'count(.//w:br[@w:type="page"])'
+
+# 段落样式分类
+_STYLE_HEADING = 'heading'
+_STYLE_LIST = 'list'
+_STYLE_BODY = 'body'
+
+_HEADING_RE = re.compile(r'Heading\s*(\d+)')
+
+# 样式名 -> (分类, 标题级别)，文档中样式名高度重复，分类结果按名称缓存
+_STYLE_CLASS: Dict[str, Tuple[str, int]] = {}
+
+
+@lru_cache(maxsize=64)
+def _heading_level(style_name: str) -> int:
+    """解析标题样式名中的级别，如 "Heading 2" -> 2，无数字时为1"""
+    match = _HEADING_RE.match(style_name)
+    return int(match.group(1)) if match else 1
+
+
+def _classify_style(style_name: Optional[str]) -> Tuple[str, int]:
+    """
+    按样式名对段落分类
+    
+    Args:
+        style_name: 段落样式名，可以为None
+        
+    Returns:
+        Tuple[str, int]: (_STYLE_HEADING/_STYLE_LIST/_STYLE_BODY, 标题级别)，非标题的级别为0
+    """
+    if not style_name:
+        return _STYLE_BODY, 0
+    
+    result = _STYLE_CLASS.get(style_name)
+    if result is None:
+        if style_name.startswith('Heading'):
+            result = (_STYLE_HEADING, _heading_level(style_name))
+        elif 'List' in style_name or 'Bullet' in style_name:
+            result = (_STYLE_LIST, 0)
+        else:
+            result = (_STYLE_BODY, 0)
+        _STYLE_CLASS[style_name] = result
+    return result
+
+
+@lru_cache(maxsize=None)
+def _inline_shape_finder():
+    """编译图片定位XPath（首次使用时）"""
+    from lxml import etree
+    return etree.XPath(_INLINE_SHAPE_XPATH, namespaces=_NSMAP)
+
+
+def _count_inline_shapes(elem) -> int:
+    """统计元素内的嵌入式图片数量"""
+    return len(_inline_shape_finder()(elem))
+
+
+@lru_cache(maxsize=None)
+def _page_break_counter():
+    """编译分页符计数XPath（首次使用时）"""
+    from lxml import etree
+    return etree.XPath(_PAGE_BREAK_XPATH, namespaces=_NSMAP)
+
+
+def _count_page_breaks(elem) -> int:
+    """统计元素内的分页符数量"""
+    return int(_page_break_counter()(elem))
+
+
+def _element_counts(doc) -> Dict[str, int]:
+    """
+    用XPath在lxml中直接统计段落、表格、图片和节的数量，不构建python-docx包装对象
+    
+    统计口径与 doc.paragraphs、doc.tables、doc.inline_shapes、doc.sections 一致。
+    """
+    document = doc.element
+    body = document.body
+    return {
+        'paragraph_count': int(body.xpath('count(./w:p)')),
+        'table_count': int(body.xpath('count(./w:tbl)')),
+        'image_count': int(body.xpath('count(//w:p/w:r/w:drawing/wp:inline)')),
+        'section_count': int(document.xpath('count(./w:body/w:p/w:pPr/w:sectPr | ./w:body/w:sectPr)'))
+    }
+
+
+def _paragraph_text(p) -> str:
+    """按 python-docx Paragraph.text 的规则拼接段落文本（制表符为\\t，换行为\\n）"""
+    parts = []
+    for r in p.iterchildren(_W_R):
+        for child in r:
+            tag = child.tag
+            if tag == _W_T:
+                parts.append(child.text or '')
+            elif tag == _W_TAB:
+                parts.append('\t')
+            elif tag in _W_BREAKS:
+                parts.append('\n')
+    return ''.join(parts)
+
+
+def _is_section_properties(elem) -> bool:
+    """判断 sectPr 是否为 python-docx Sections 会计入的节属性"""
+    parent = elem.getparent()
+    if parent.tag == _W_BODY:
+        return True
+    if parent.tag != _W_PPR:
+        return False
+    p = parent.getparent()
+    return p.tag == _W_P and p.getparent().tag == _W_BODY
+
+
+def _iter_body_blocks(zf: zipfile.ZipFile) -> Iterator[Tuple[str, Any, Any]]:
+    """
+    流式遍历文档主体的顶层段落、表格和节属性，不构建完整的文档对象模型
+    
+    Args:
+        zf: 已打开的docx压缩包
+        
+    Yields:
+        Tuple[str, Any, Any]: ('p', 段落文本, 元素)、('tbl', 各行单元格文本, 元素) 或 ('sectPr', None, 元素)。
+        元素只在当前迭代步骤内有效，随后会被清空释放
+    """
+    from lxml import etree
+    from docx.oxml import parse_xml
+    from docx.table import Table
+    
+    with zf.open(_MAIN_DOCUMENT_PART) as f:
+        for _, elem in etree.iterparse(f, events=('end',), tag=(_W_P, _W_TBL, _W_SECTPR)):
+            if elem.tag == _W_SECTPR:
+                if _is_section_properties(elem):
+                    yield 'sectPr', None, elem
+                continue
+            
+            parent = elem.getparent()
+            if parent.tag != _W_BODY:
+                # 表格内的段落随所在表格一起处理
+                continue
+            
+            if elem.tag == _W_P:
+                yield 'p', _paragraph_text(elem), elem
+            else:
+                # 表格交给 python-docx 处理，保持合并单元格的展开规则
+                table = Table(parse_xml(etree.tostring(elem)), None)
+                rows = [[cell.text for cell in row.cells] for row in table.rows]
+                yield 'tbl', rows, elem
+            
+            # 释放已处理的顶层元素
+            elem.clear()
+            while elem.getprevious() is not None:
+                del parent[0]
+
+
+def _read_core_properties(zf: zipfile.ZipFile) -> Optional['CoreProperties']:
+    """读取文档核心属性，不存在时返回None"""
+    from docx.opc.coreprops import CoreProperties
+    from docx.oxml import parse_xml
+    
+    if _CORE_PROPERTIES_PART not in zf.namelist():
+        return None
+    return CoreProperties(parse_xml(zf.read(_CORE_PROPERTIES_PART)))
+
+
+def _open_doc(path: str, size: Optional[int] = None) -> Union[str, io.BytesIO]:
+    """
+    返回可交给 Document() / zipfile.ZipFile() 的文件来源
+    
+    docx 是 zip 包，打开时需先读取文件末尾的中央目录、再逐个读取条目头和内容。
+    文件不大时整体顺序读入 BytesIO，后续随机访问都在内存中完成；大文件仍按路径打开。
+    
+    Args:
+        path: 文件路径
+        size: 调用方已知的文件大小，避免重复stat
+    """
+    if size is None:
+        size = os.path.getsize(path)
+    if size > _PREFETCH_LIMIT:
+        return path
+    with open(path, 'rb') as f:
+        return io.BytesIO(f.read())
+
+
+@lru_cache(maxsize=8)
+def _cached_document(path: str, mtime_ns: int, size: int):
+    """
+    解析并缓存只读使用的文档对象
+    
+    修改时间和大小是缓存键的一部分，文件变化后自动重新解析。返回的对象在多次调用间共享，调用方不得修改。
+    """
+    from docx import Document
+    return Document(_open_doc(path, size))
+
 
 class DocumentUtils:
     """文档工具类"""
     
+    # 文档摘要缓存：(路径, 修改时间, 大小) -> 摘要，按LRU淘汰
+    _summary_cache: 'OrderedDict[Tuple[str, int, int], Dict[str, Any]]' = OrderedDict()
+    _summary_cache_lock = threading.Lock()
+    _SUMMARY_CACHE_SIZE = 32
+    
     @staticmethod
-    def validate_docx_file(file_path: str) -> Dict[str, Any]:
+    def _load(file_path: str, st: Optional[os.stat_result] = None):
+        """
+        加载文档（只读），同一文件未修改时复用已解析的对象
+        
+        Args:
+            file_path: 文件路径
+            st: 调用方已获取的 os.stat 结果，避免重复stat
+        """
+        if st is None:
+            st = os.stat(file_path)
+        return _cached_document(file_path, st.st_mtime_ns, st.st_size)
+    
+    @staticmethod
+    def validate_docx_file(file_path: str, detailed: bool = False) -> Dict[str, Any]:
         """
         验证docx文件
         
+        默认只检查zip包结构和主文档部件是否存在，不解析文档内容；
+        需要段落、表格、节数量时传入 detailed=True。
+        
         Args:
             file_path: 文件路径
+            detailed: 是否解析文档并统计段落、表格、节数量
             
         Returns:
             Dict[str, Any]: 验证结果
@@ -36,8 +288,10 @@ class DocumentUtils:
         }
         
         try:
-            # 检查文件是否存在
-            if not os.path.exists(file_path):
+            # 检查文件是否存在（一次stat同时取得大小和修改时间）
+            try:
+                st = os.stat(file_path)
+            except FileNotFoundError:
                 result['errors'].append("文件不存在")
                 return result
             
@@ -47,7 +301,7 @@ class DocumentUtils:
                 return result
             
             # 检查文件大小
-            file_size = os.path.getsize(file_path)
+            file_size = st.st_size
             if file_size == 0:
                 result['errors'].append("文件为空")
                 return result
@@ -57,13 +311,23 @@ class DocumentUtils:
             
             # 尝试打开文档
             try:
-                doc = Document(file_path)
-                result['file_info'] = {
-                    'size': file_size,
-                    'paragraph_count': len(doc.paragraphs),
-                    'table_count': len(doc.tables),
-                    'section_count': len(doc.sections)
-                }
+                with zipfile.ZipFile(file_path) as zf:
+                    if _MAIN_DOCUMENT_PART not in zf.namelist():
+                        result['errors'].append("不是有效的docx文档包")
+                        return result
+                
+                file_info = {'size': file_size}
+                
+                if detailed:
+                    doc = DocumentUtils._load(file_path, st)
+                    counts = _element_counts(doc)
+                    file_info.update({
+                        'paragraph_count': counts['paragraph_count'],
+                        'table_count': counts['table_count'],
+                        'section_count': counts['section_count']
+                    })
+                
+                result['file_info'] = file_info
                 result['is_valid'] = True
                 
             except Exception as e:
@@ -100,41 +364,70 @@ class DocumentUtils:
             'modified': None
         }
         
+        try:
+            st = os.stat(file_path)
+        except OSError:
+            st = None
+        
+        # 文件未变化时直接返回缓存的摘要副本
+        cache_key = None
+        if st is not None:
+            cache_key = (file_path, st.st_mtime_ns, st.st_size)
+            with DocumentUtils._summary_cache_lock:
+                cached = DocumentUtils._summary_cache.get(cache_key)
+                if cached is not None:
+                    DocumentUtils._summary_cache.move_to_end(cache_key)
+            if cached is not None:
+                return dict(cached)
+        
         try:
             # 文件基本信息
-            if os.path.exists(file_path):
-                summary['file_size'] = os.path.getsize(file_path)
-            
-            # 文档内容信息
-            doc = Document(file_path)
+            if st is not None:
+                summary['file_size'] = st.st_size
             
-            # 段落和文本统计
-            summary['paragraph_count'] = len(doc.paragraphs)
-            
-            # 统计单词和字符数
+            # 文档内容信息（流式解析，不构建完整对象模型）
+            paragraph_count = 0
+            table_count = 0
+            image_count = 0
             word_count = 0
             char_count = 0
             
-            for paragraph in doc.paragraphs:
-                text = paragraph.text
-                char_count += len(text)
-                word_count += len(text.split())
+            with zipfile.ZipFile(_open_doc(file_path, st.st_size if st is not None else None)) as zf:
+                for kind, content, elem in _iter_body_blocks(zf):
+                    if kind == 'p':
+                        paragraph_count += 1
+                        char_count += len(content)
+                        word_count += len(content.split())
+                    elif kind == 'tbl':
+                        table_count += 1
+                    if kind != 'sectPr':
+                        image_count += _count_inline_shapes(elem)
+                
+                core_props = _read_core_properties(zf)
             
+            # 段落和文本统计
+            summary['paragraph_count'] = paragraph_count
             summary['word_count'] = word_count
             summary['character_count'] = char_count
             
             # 表格统计
-            summary['table_count'] = len(doc.tables)
+            summary['table_count'] = table_count
             
             # 图片统计
-            summary['image_count'] = len(doc.inline_shapes)
+            summary['image_count'] = image_count
             
             # 文档属性
-            core_props = doc.core_properties
-            summary['title'] = core_props.title or ''
-            summary['author'] = core_props.author or ''
-            summary['created'] = core_props.created
-            summary['modified'] = core_props.modified
+            if core_props is not None:
+                summary['title'] = core_props.title or ''
+                summary['author'] = core_props.author or ''
+                summary['created'] = core_props.created
+                summary['modified'] = core_props.modified
+            
+            if cache_key is not None:
+                with DocumentUtils._summary_cache_lock:
+                    DocumentUtils._summary_cache[cache_key] = dict(summary)
+                    if len(DocumentUtils._summary_cache) > DocumentUtils._SUMMARY_CACHE_SIZE:
+                        DocumentUtils._summary_cache.popitem(last=False)
             
         except Exception as e:
             logger.error(f"获取文档摘要失败: {e}")
@@ -154,25 +447,25 @@ class DocumentUtils:
             str: 纯文本内容
         """
         try:
-            doc = Document(file_path)
             text_content = []
-            
-            # 提取段落文本
-            for paragraph in doc.paragraphs:
-                if paragraph.text.strip():
-                    text_content.append(paragraph.text)
-            
-            # 提取表格文本
-            if include_tables:
-                for table in doc.tables:
-                    for row in table.rows:
-                        row_text = []
-                        for cell in row.cells:
-                            if cell.text.strip():
-                                row_text.append(cell.text.strip())
-                        if row_text:
-                            text_content.append('\t'.join(row_text))
-            
+            table_content = []
+            
+            with zipfile.ZipFile(_open_doc(file_path)) as zf:
+                for kind, content, _ in _iter_body_blocks(zf):
+                    # 提取段落文本
+                    if kind == 'p':
+                        if content.strip():
+                            text_content.append(content)
+                    
+                    # 提取表格文本，统一放在段落之后
+                    elif kind == 'tbl' and include_tables:
+                        for row in content:
+                            # 每个单元格只strip一次
+                            row_text = [text for text in map(str.strip, row) if text]
+                            if row_text:
+                                table_content.append('\t'.join(row_text))
+            
+            text_content.extend(table_content)
             return '\n'.join(text_content)
             
         except Exception as e:
@@ -191,7 +484,7 @@ class DocumentUtils:
             Dict[str, Any]: 结构化内容
         """
         try:
-            doc = Document(file_path)
+            doc = DocumentUtils._load(file_path)
             structured_content = {
                 'headings': [],
                 'paragraphs': [],
@@ -200,21 +493,35 @@ class DocumentUtils:
                 'images': []
             }
             
-            # 提取标题
+            # 单次遍历完成标题、段落、列表的分类
             for paragraph in doc.paragraphs:
-                if paragraph.style and paragraph.style.name.startswith('Heading'):
+                style = paragraph.style
+                style_name = style.name if style else None
+                style_class, level = _classify_style(style_name)
+                
+                # 提取标题
+                if style_class == _STYLE_HEADING:
                     structured_content['headings'].append({
                         'text': paragraph.text,
-                        'level': int(paragraph.style.name.split()[-1]) if paragraph.style.name.split()[-1].isdigit() else 1,
-                        'style': paragraph.style.name
+                        'level': level,
+                        'style': style_name
                     })
-            
-            # 提取段落
-            for paragraph in doc.paragraphs:
-                if paragraph.text.strip() and not (paragraph.style and paragraph.style.name.startswith('Heading')):
+                    continue
+                
+                text = paragraph.text
+                
+                # 提取段落
+                if text.strip():
                     structured_content['paragraphs'].append({
-                        'text': paragraph.text,
-                        'style': paragraph.style.name if paragraph.style else 'Normal'
+                        'text': text,
+                        'style': style_name or 'Normal'
+                    })
+                
+                # 提取列表
+                if style_class == _STYLE_LIST:
+                    structured_content['lists'].append({
+                        'text': text,
+                        'style': style_name
                     })
             
             # 提取表格
@@ -225,20 +532,14 @@ class DocumentUtils:
                     table_data.append(row_data)
                 structured_content['tables'].append(table_data)
             
-            # 提取列表
-            for paragraph in doc.paragraphs:
-                if paragraph.style and ('List' in paragraph.style.name or 'Bullet' in paragraph.style.name):
-                    structured_content['lists'].append({
-                        'text': paragraph.text,
-                        'style': paragraph.style.name
-                    })
-            
-            # 提取图片信息
-            for i, shape in enumerate(doc.inline_shapes):
+            # 提取图片信息，直接读取 wp:extent 尺寸，不构建 InlineShape 对象
+            from docx.shared import Emu
+            for i, inline in enumerate(_inline_shape_finder()(doc.element.body)):
+                extent = inline.find(_WP_EXTENT)
                 structured_content['images'].append({
                     'index': i,
-                    'width': shape.width,
-                    'height': shape.height
+                    'width': Emu(int(extent.get('cx'))),
+                    'height': Emu(int(extent.get('cy')))
                 })
             
             return structured_content
@@ -303,37 +604,79 @@ class DocumentUtils:
                 logger.error("没有提供要合并的文档")
                 return False
             
+            from docx import Document
+            from docx.enum.text import WD_BREAK
+            from docx.oxml.table import CT_Tbl
+            from docx.table import Table
+            
             # 创建新文档
             merged_doc = Document()
-            
+            merged_styles = merged_doc.styles
+            # 样式名 -> 合并文档中的样式对象，每个样式名只查找一次
+            style_cache = {}
+            
+            # 新元素先脱离文档构建，最后一次性插入到 sectPr 之前；
+            # 逐个 add_paragraph/add_table 每次都要线性查找 sectPr，合并大文档时为平方级
+            body = merged_doc.element.body
+            container = merged_doc._body
+            block_width = merged_doc._block_width
+            new_elements = []
+            
+            existing = []
             for i, doc_path in enumerate(doc_paths):
-                if not os.path.exists(doc_path):
+                try:
+                    st = os.stat(doc_path)
+                except FileNotFoundError:
                     logger.warning(f"文档不存在，跳过: {doc_path}")
                     continue
+                existing.append((i, doc_path, st))
+            
+            # 并行加载各文档，合并按原顺序在当前线程中进行（python-docx写操作非线程安全）
+            with ThreadPoolExecutor(max_workers=max(1, min(8, len(existing)))) as executor:
+                futures = [executor.submit(DocumentUtils._load, doc_path, st) for _, doc_path, st in existing]
                 
-                # 加载文档
-                doc = Document(doc_path)
-                
-                # 添加文档标题
-                if i > 0:
-                    merged_doc.add_page_break()
-                
-                merged_doc.add_heading(f"文档 {i+1}: {os.path.basename(doc_path)}", level=1)
-                
-                # 复制段落
-                for paragraph in doc.paragraphs:
-                    if paragraph.text.strip():
-                        new_para = merged_doc.add_paragraph(paragraph.text)
-                        if paragraph.style:
-                            new_para.style = paragraph.style.name
-                
-                # 复制表格
-                for table in doc.tables:
-                    new_table = merged_doc.add_table(rows=len(table.rows), cols=len(table.columns))
-                    for i, row in enumerate(table.rows):
-                        for j, cell in enumerate(row.cells):
-                            if i < len(new_table.rows) and j < len(new_table.rows[i].cells):
-                                new_table.rows[i].cells[j].text = cell.text
+                for (i, doc_path, _), future in zip(existing, futures):
+                    # 加载文档
+                    doc = future.result()
+                    
+                    # 添加文档标题
+                    if i > 0:
+                        page_break = DocumentUtils._new_paragraph(container)
+                        page_break.add_run().add_break(WD_BREAK.PAGE)
+                        new_elements.append(page_break._p)
+                    
+                    heading = DocumentUtils._new_paragraph(
+                        container, f"文档 {i+1}: {os.path.basename(doc_path)}", 'Heading 1'
+                    )
+                    new_elements.append(heading._p)
+                    
+                    # 复制段落
+                    for paragraph in doc.paragraphs:
+                        text = paragraph.text
+                        if text.strip():
+                            style = paragraph.style
+                            merged_style = None
+                            if style:
+                                style_name = style.name
+                                merged_style = style_cache.get(style_name)
+                                if merged_style is None:
+                                    merged_style = style_cache[style_name] = merged_styles[style_name]
+                            new_elements.append(DocumentUtils._new_paragraph(container, text, merged_style)._p)
+                    
+                    # 复制表格
+                    for table in doc.tables:
+                        rows = table.rows
+                        new_table = Table(CT_Tbl.new_tbl(len(rows), len(table.columns), block_width), container)
+                        new_table.style = None
+                        # 新表格与源表格行列数一致，逐行取一次单元格列表即可
+                        for row, new_row in zip(rows, new_table.rows):
+                            for cell, new_cell in zip(row.cells, new_row.cells):
+                                new_cell.text = cell.text
+                        new_elements.append(new_table._tbl)
+            
+            sect_pr = body.sectPr
+            insert_at = body.index(sect_pr) if sect_pr is not None else len(body)
+            body[insert_at:insert_at] = new_elements
             
             # 保存合并后的文档
             merged_doc.save(output_path)
@@ -344,6 +687,38 @@ class DocumentUtils:
             logger.error(f"合并文档失败: {e}")
             return False
     
+    @staticmethod
+    def _new_paragraph(container, text: str = '', style=None):
+        """
+        创建尚未插入文档的段落，行为与 add_paragraph 一致
+        
+        Args:
+            container: 段落所属的块容器（用于解析样式）
+            text: 段落文本
+            style: 段落样式对象或样式名
+        """
+        from docx.oxml import OxmlElement
+        from docx.text.paragraph import Paragraph
+        
+        paragraph = Paragraph(OxmlElement('w:p'), container)
+        if text:
+            paragraph.add_run(text)
+        if style is not None:
+            paragraph.style = style
+        return paragraph
+    
+    @staticmethod
+    def _save_section(section: Tuple[str, List[str]], output_file: str):
+        """将一个标题及其下属段落生成为独立文档并保存"""
+        from docx import Document
+        
+        heading, paragraphs = section
+        section_doc = Document()
+        section_doc.add_heading(heading, level=1)
+        for text in paragraphs:
+            section_doc.add_paragraph(text)
+        section_doc.save(output_file)
+    
     @staticmethod
     def split_document_by_headings(file_path: str, output_dir: str) -> List[str]:
         """
@@ -357,41 +732,33 @@ class DocumentUtils:
             List[str]: 生成的文件路径列表
         """
         try:
-            doc = Document(file_path)
-            output_files = []
+            doc = DocumentUtils._load(file_path)
             
             # 确保输出目录存在
-            if not os.path.exists(output_dir):
-                os.makedirs(output_dir)
-            
-            current_doc = None
-            current_heading = None
-            file_counter = 1
+            os.makedirs(output_dir, exist_ok=True)
             
+            # 第一遍：按标题收集各部分内容
+            sections = []
             for paragraph in doc.paragraphs:
+                style = paragraph.style
+                
                 # 检查是否为标题
-                if paragraph.style and paragraph.style.name.startswith('Heading'):
-                    # 保存当前文档
-                    if current_doc:
-                        output_file = os.path.join(output_dir, f"section_{file_counter}_{current_heading}.docx")
-                        current_doc.save(output_file)
-                        output_files.append(output_file)
-                        file_counter += 1
-                    
-                    # 创建新文档
-                    current_doc = Document()
-                    current_heading = paragraph.text.replace('/', '_').replace('\\', '_')[:50]
-                    current_doc.add_heading(paragraph.text, level=1)
+                if _classify_style(style.name if style else None)[0] == _STYLE_HEADING:
+                    sections.append((paragraph.text, []))
                 
-                # 添加段落到当前文档
-                elif current_doc:
-                    current_doc.add_paragraph(paragraph.text)
+                # 添加段落到当前部分
+                elif sections:
+                    sections[-1][1].append(paragraph.text)
+            
+            output_files = []
+            for file_counter, (heading, _) in enumerate(sections, 1):
+                safe_heading = heading.replace('/', '_').replace('\\', '_')[:50]
+                output_files.append(os.path.join(output_dir, f"section_{file_counter}_{safe_heading}.docx"))
             
-            # 保存最后一个文档
-            if current_doc:
-                output_file = os.path.join(output_dir, f"section_{file_counter}_{current_heading}.docx")
-                current_doc.save(output_file)
-                output_files.append(output_file)
+            # 第二遍：各部分独立生成，并行保存
+            if sections:
+                with ThreadPoolExecutor(max_workers=min(8, len(sections))) as executor:
+                    list(executor.map(DocumentUtils._save_section, sections, output_files))
             
             logger.info(f"成功分割文档为 {len(output_files)} 个文件")
             return output_files
@@ -413,42 +780,45 @@ class DocumentUtils:
             bool: 是否转换成功
         """
         try:
-            doc = Document(file_path)
-            html_content = []
-            
-            html_content.append('<!DOCTYPE html>')
-            html_content.append('<html>')
-            html_content.append('<head>')
-            html_content.append('<meta charset="UTF-8">')
-            html_content.append('<title>转换的文档</title>')
-            html_content.append('</head>')
-            html_content.append('<body>')
-            
-            for paragraph in doc.paragraphs:
-                if paragraph.text.strip():
-                    # 检查是否为标题
-                    if paragraph.style and paragraph.style.name.startswith('Heading'):
-                        level = int(paragraph.style.name.split()[-1]) if paragraph.style.name.split()[-1].isdigit() else 1
-                        html_content.append(f'<h{level}>{paragraph.text}</h{level}>')
-                    else:
-                        html_content.append(f'<p>{paragraph.text}</p>')
-            
-            # 添加表格
-            for table in doc.tables:
-                html_content.append('<table border="1">')
-                for row in table.rows:
-                    html_content.append('<tr>')
-                    for cell in row.cells:
-                        html_content.append(f'<td>{cell.text}</td>')
-                    html_content.append('</tr>')
-                html_content.append('</table>')
-            
-            html_content.append('</body>')
-            html_content.append('</html>')
-            
-            # 保存HTML文件
-            with open(output_path, 'w', encoding='utf-8') as f:
-                f.write('\n'.join(html_content))
+            doc = DocumentUtils._load(file_path)
+            
+            # 边遍历边写入，不在内存中累积整个HTML
+            with open(output_path, 'w', encoding='utf-8', buffering=1024 * 1024) as f:
+                write = f.write
+                escape = html.escape
+                write('<!DOCTYPE html>\n'
+                      '<html>\n'
+                      '<head>\n'
+                      '<meta charset="UTF-8">\n'
+                      '<title>转换的文档</title>\n'
+                      '</head>\n'
+                      '<body>\n')
+                
+                for paragraph in doc.paragraphs:
+                    # paragraph.text 每次访问都要遍历所有run，只取一次
+                    text = paragraph.text
+                    if text.strip():
+                        text = escape(text)
+                        style = paragraph.style
+                        style_class, level = _classify_style(style.name if style else None)
+                        # 检查是否为标题
+                        if style_class == _STYLE_HEADING:
+                            write(f'<h{level}>{text}</h{level}>\n')
+                        else:
+                            write(f'<p>{text}</p>\n')
+                
+                # 添加表格
+                for table in doc.tables:
+                    write('<table border="1">\n')
+                    for row in table.rows:
+                        write('<tr>\n')
+                        for cell in row.cells:
+                            write(f'<td>{escape(cell.text)}</td>\n')
+                        write('</tr>\n')
+                    write('</table>\n')
+                
+                write('</body>\n'
+                      '</html>\n')
             
             logger.info(f"成功转换为HTML: {output_path}")
             return True
@@ -469,34 +839,48 @@ class DocumentUtils:
             Dict[str, Any]: 统计信息
         """
         try:
-            doc = Document(file_path)
             stats = {
-                'paragraphs': len(doc.paragraphs),
-                'tables': len(doc.tables),
-                'images': len(doc.inline_shapes),
-                'sections': len(doc.sections),
-                'styles': len(doc.styles),
+                'paragraphs': 0,
+                'tables': 0,
+                'images': 0,
+                'sections': 0,
+                'styles': 0,
                 'word_count': 0,
                 'character_count': 0,
                 'line_count': 0,
                 'page_breaks': 0
             }
             
-            # 统计文本信息
-            for paragraph in doc.paragraphs:
-                text = paragraph.text
-                stats['character_count'] += len(text)
-                stats['word_count'] += len(text.split())
-                stats['line_count'] += text.count('\n') + 1
-                
-                # 检查分页符
-                if '\f' in text or 'page_break' in str(paragraph._element):
-                    stats['page_breaks'] += 1
+            paragraph_texts = []
+            cell_texts = []
             
-            # 统计表格信息
-            for table in doc.tables:
-                stats['word_count'] += sum(len(cell.text.split()) for row in table.rows for cell in row.cells)
-                stats['character_count'] += sum(len(cell.text) for row in table.rows for cell in row.cells)
+            with zipfile.ZipFile(_open_doc(file_path)) as zf:
+                for kind, content, elem in _iter_body_blocks(zf):
+                    if kind == 'sectPr':
+                        stats['sections'] += 1
+                        continue
+                    
+                    stats['images'] += _count_inline_shapes(elem)
+                    stats['page_breaks'] += _count_page_breaks(elem)
+                    
+                    if kind == 'p':
+                        paragraph_texts.append(content)
+                    else:
+                        stats['tables'] += 1
+                        for row in content:
+                            cell_texts.extend(row)
+                
+                if _STYLES_PART in zf.namelist():
+                    from lxml import etree
+                    styles = etree.fromstring(zf.read(_STYLES_PART))
+                    stats['styles'] = len(styles.findall(_W_STYLE))
+            
+            # 统计文本信息，map 在C层完成逐项计算
+            stats['paragraphs'] = len(paragraph_texts)
+            stats['character_count'] = sum(map(len, paragraph_texts)) + sum(map(len, cell_texts))
+            stats['word_count'] = (sum(map(len, map(str.split, paragraph_texts)))
+                                   + sum(map(len, map(str.split, cell_texts))))
+            stats['line_count'] = sum(map(str.count, paragraph_texts, repeat('\n'))) + len(paragraph_texts)
             
             return stats
             
@@ -13,12 +13,13 @@
 """
 
 from .clients.aliyun_client import AliyunClient
-from .utils.file_handler import FileHandler
+from .utils.file_handler import FileHandler, get_file_handler
 
 __version__ = "1.0.0"
 __author__ = "AI Assistant"
 
 __all__ = [
     'AliyunClient',
-    'FileHandler'
+    'FileHandler',
+    'get_file_handler'
 ]
\ No newline at end of file
@@ -4,48 +4,675 @@
 基于阿里云百炼API实现的大语言模型客户端，支持直接调用大模型进行对话。
 """
 
+import io
 import os
+import re
+import copy
+import time
+import uuid
+import mimetypes
+import random
+import logging
+import socket
+import sqlite3
+import zlib
+import asyncio
+import hashlib
+import threading
 import requests
 import json
-from typing import Dict, List, Any, Optional, Union
+from collections import OrderedDict
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Any, Optional, Union, Iterator, Callable
 from http import HTTPStatus
 from datetime import datetime
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
-# 导入集中式日志系统
-import sys
-sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+# orjson 为可选依赖，未安装时回退到标准库json
 try:
-    from utils.logger import get_logger, timing_decorator
+    import orjson
+except ImportError:
+    orjson = None
+
+# 导入集中式日志系统（项目根目录由入口脚本加入模块搜索路径，不在此修改 sys.path）
+try:
+    from utils.logger import get_logger
     logger = get_logger(__name__)
 except ImportError:
-    import logging
     logger = logging.getLogger(__name__)
 
 
+# 对话消息角色
+_ROLE_SYSTEM = "system"
+_ROLE_USER = "user"
+
+# 固定的系统提示消息，只读共享
+_ASSISTANT_SYSTEM_MESSAGE = {"role": _ROLE_SYSTEM, "content": "You are a helpful assistant."}
+
+
+def _user_message(content: str) -> Dict[str, str]:
+    """构建用户消息"""
+    return {"role": _ROLE_USER, "content": content}
+
+
+def _file_message(file_id: str) -> Dict[str, str]:
+    """构建引用已上传文件的系统消息"""
+    return {"role": _ROLE_SYSTEM, "content": f"fileid://{file_id}"}
+
+
+def _json_dumps(data: Any, sort_keys: bool = False) -> bytes:
+    """将请求数据编码为UTF-8 JSON字节串，sort_keys=True 时输出与键顺序无关（用于缓存键）"""
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_SORT_KEYS if sort_keys else 0)
+    return json.dumps(data, ensure_ascii=False, sort_keys=sort_keys).encode('utf-8')
+
+
+def _json_loads(content: Union[bytes, str]) -> Any:
+    """解析JSON响应体"""
+    if orjson is not None:
+        return orjson.loads(content)
+    return json.loads(content)
+
+
+class _LazyJSON:
+    """
+    日志参数包装：只有日志记录真正被某个处理器输出时才序列化为JSON
+    
+    请求体包含完整的提示词和文档内容，未输出DEBUG日志时不应承担序列化开销。
+    """
+    
+    __slots__ = ('_data', '_text')
+    
+    def __init__(self, data: Any):
+        self._data = data
+        self._text = None
+    
+    def __str__(self) -> str:
+        if self._text is None:
+            self._text = _json_dumps(self._data).decode('utf-8')
+        return self._text
+
+
+def _error_message(response: requests.Response) -> str:
+    """
+    提取错误响应中的错误信息
+    
+    仅在响应声明为JSON时尝试解析，非JSON响应（如网关返回的HTML/纯文本）直接返回原文。
+    """
+    if 'json' in response.headers.get('Content-Type', ''):
+        try:
+            error_data = _json_loads(response.content)
+        except ValueError:
+            error_data = None
+        if isinstance(error_data, dict):
+            return error_data.get('message', response.text)
+    return response.text
+
+
+def _error_result(response: requests.Response) -> Dict[str, Any]:
+    """根据非200响应构建统一的失败结果"""
+    return {
+        'success': False,
+        'status_code': response.status_code,
+        'message': _error_message(response)
+    }
+
+
+# 流式响应每次读取的最大字节数。requests 默认按512字节读取，长输出时要循环数千次；
+# 服务端以分块传输（chunked）发送事件，每个分块到达即返回，增大读取上限不会推迟收到的时间
+_SSE_READ_SIZE = 64 * 1024
+
+
+def _iter_sse_chunks(response: requests.Response) -> Iterator[Dict[str, Any]]:
+    """
+    逐个解析流式响应（SSE）中的数据块，收到 [DONE] 时结束
+    
+    按字节切分行，不做逐行解码，数据部分直接交给JSON解析。
+    
+    Args:
+        response: 以 stream=True 发出的请求的响应
+        
+    Returns:
+        Iterator[Dict[str, Any]]: 解析后的数据块
+    """
+    for line in response.iter_lines(chunk_size=_SSE_READ_SIZE):
+        if not line.startswith(b'data: '):
+            continue
+        data_str = line[6:]
+        if data_str.strip() == b'[DONE]':
+            break
+        try:
+            yield _json_loads(data_str)
+        except json.JSONDecodeError:
+            continue
+
+
+def _chunk_content(chunk: Dict[str, Any]) -> str:
+    """提取流式数据块中的增量文本"""
+    choices = chunk.get('choices')
+    if not choices:
+        return ''
+    return choices[0].get('delta', {}).get('content') or ''
+
+
+# 无法根据扩展名判断类型时使用的文件类型（上传的主要是Word文档）
+_DEFAULT_UPLOAD_CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.wordprocessingml.document'
+
+
+def _file_sha256(file_path: str) -> str:
+    """分块计算文件内容的SHA-256"""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _quote_multipart_param(value: str) -> str:
+    """按HTML5规则转义multipart头中的参数值"""
+    return (value.replace('\\', '\\\\').replace('"', '%22')
+            .replace('\r', '%0D').replace('\n', '%0A'))
+
+
+class _MultipartFileBody:
+    """
+    流式 multipart/form-data 请求体
+    
+    requests 处理 files= 参数时会先把整个文件读入内存拼成请求体；这里按块从文件读取，
+    内存占用与文件大小无关。提供长度以便设置 Content-Length，并支持 tell/seek，
+    连接池重试时可以回到起点重新发送。
+    """
+    
+    _CHUNK_SIZE = 64 * 1024
+    
+    def __init__(self, fields: Dict[str, str], file_field: str, file_name: str, file_obj, content_type: str):
+        """
+        Args:
+            fields: 普通表单字段
+            file_field: 文件字段名
+            file_name: 文件名
+            file_obj: 以二进制模式打开的可定位文件对象（文件或BytesIO）
+            content_type: 文件的MIME类型
+        """
+        self.boundary = uuid.uuid4().hex
+        
+        parts = [
+            f'--{self.boundary}\r\n'
+            f'Content-Disposition: form-data; name="{_quote_multipart_param(name)}"\r\n\r\n'
+            f'{value}\r\n'
+            for name, value in fields.items()
+        ]
+        parts.append(
+            f'--{self.boundary}\r\n'
+            f'Content-Disposition: form-data; name="{_quote_multipart_param(file_field)}"; '
+            f'filename="{_quote_multipart_param(file_name)}"\r\n'
+            f'Content-Type: {content_type}\r\n\r\n'
+        )
+        self._head = ''.join(parts).encode('utf-8')
+        self._tail = f'\r\n--{self.boundary}--\r\n'.encode('utf-8')
+        
+        self._file = file_obj
+        self._file_start = file_obj.tell()
+        self._file_size = file_obj.seek(0, os.SEEK_END) - self._file_start
+        file_obj.seek(self._file_start)
+        self._file_end = len(self._head) + self._file_size
+        self._length = self._file_end + len(self._tail)
+        self._pos = 0
+    
+    @property
+    def content_type(self) -> str:
+        """请求的Content-Type头"""
+        return f'multipart/form-data; boundary={self.boundary}'
+    
+    def __len__(self) -> int:
+        return self._length
+    
+    def __iter__(self) -> Iterator[bytes]:
+        while True:
+            chunk = self.read(self._CHUNK_SIZE)
+            if not chunk:
+                break
+            yield chunk
+    
+    def tell(self) -> int:
+        return self._pos
+    
+    def seek(self, offset: int, whence: int = os.SEEK_SET) -> int:
+        if whence == os.SEEK_CUR:
+            offset += self._pos
+        elif whence == os.SEEK_END:
+            offset += self._length
+        self._pos = max(0, min(offset, self._length))
+        file_offset = min(max(self._pos - len(self._head), 0), self._file_size)
+        self._file.seek(self._file_start + file_offset)
+        return self._pos
+    
+    def read(self, size: int = -1) -> bytes:
+        if size is None or size < 0:
+            size = self._length - self._pos
+        
+        chunks = []
+        head_size = len(self._head)
+        while size > 0 and self._pos < self._length:
+            if self._pos < head_size:
+                chunk = self._head[self._pos:self._pos + size]
+            elif self._pos < self._file_end:
+                chunk = self._file.read(min(size, self._file_end - self._pos))
+                if not chunk:
+                    raise IOError("上传过程中文件被截断")
+            else:
+                offset = self._pos - self._file_end
+                chunk = self._tail[offset:offset + size]
+            chunks.append(chunk)
+            self._pos += len(chunk)
+            size -= len(chunk)
+        return b''.join(chunks)
+
+
+# 请求体较小，关闭Nagle算法立即发送；长时间等待模型输出时用TCP keepalive保持连接
+_SOCKET_OPTIONS = [
+    (socket.IPPROTO_TCP, socket.TCP_NODELAY, 1),
+    (socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1),
+]
+
+
+# 限流（429）和服务端临时错误由连接池自动退避重试，并遵循服务端返回的 Retry-After；
+# 读超时不在此重试（模型生成耗时长，重发会重复计费），由调用方决定是否重试。
+# 重试用尽后返回最后一次响应，而不是抛出异常
+_RETRY_POLICY = Retry(
+    total=4,
+    read=False,
+    backoff_factor=0.8,
+    status_forcelist=(429, 500, 502, 503, 504),
+    allowed_methods=frozenset({'GET', 'POST'}),
+    respect_retry_after_header=True,
+    raise_on_status=False
+)
+
+
+async def _run_in_thread(func, *args):
+    """在默认线程池中执行同步调用，等同于 asyncio.to_thread（Python 3.9+），兼容 Python 3.8"""
+    return await asyncio.get_running_loop().run_in_executor(None, func, *args)
+
+
+def _retry_delay(attempt: int) -> float:
+    """网络异常重试前的等待时间：指数退避加随机抖动，避免并发请求同时重试"""
+    return min(2 ** attempt, 8) * random.uniform(0.5, 1.0)
+
+
+class _RateLimiter:
+    """
+    令牌桶限流器（线程安全）
+    
+    令牌按每分钟请求数匀速补充，桶容量为一分钟的配额；无令牌时阻塞等待，
+    使并发调用平稳地贴近服务端的RPM限制，而不是触发429后再退避重试。
+    """
+    
+    def __init__(self, rate_per_minute: float):
+        """
+        Args:
+            rate_per_minute: 每分钟允许的请求数
+        """
+        self._capacity = float(rate_per_minute)
+        self._rate = rate_per_minute / 60.0
+        self._tokens = self._capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def acquire(self):
+        """取得一个令牌，必要时等待"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self._capacity, self._tokens + (now - self._updated) * self._rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self._rate
+            time.sleep(wait)
+
+
+class _ResponseStore:
+    """
+    基于SQLite的持久化响应缓存（线程安全）
+    
+    进程重启后仍能命中，响应以压缩后的JSON保存；设置有效期时过期条目视为未命中，并在打开时清理。
+    使用WAL日志模式，多个工作进程共用同一个缓存文件时读写互不阻塞。
+    """
+    
+    def __init__(self, path: str, ttl: Optional[int] = None):
+        """
+        Args:
+            path: SQLite数据库文件路径
+            ttl: 缓存有效期（秒），不提供则永不过期
+        """
+        self._ttl = ttl
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        # WAL模式下 NORMAL 即可保证数据库一致，断电时最多丢失最近写入的缓存条目
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        with self._conn:
+            self._conn.execute(
+                'CREATE TABLE IF NOT EXISTS responses '
+                '(key TEXT PRIMARY KEY, value BLOB NOT NULL, created_at INTEGER NOT NULL)'
+            )
+            if ttl:
+                self._conn.execute('DELETE FROM responses WHERE created_at < ?', (int(time.time()) - ttl,))
+    
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """读取未过期的缓存响应，不存在时返回None"""
+        min_created = int(time.time()) - self._ttl if self._ttl else 0
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT value FROM responses WHERE key = ? AND created_at >= ?', (key, min_created)
+            ).fetchone()
+        return _json_loads(zlib.decompress(row[0])) if row else None
+    
+    def put(self, key: str, result: Dict[str, Any]):
+        """保存响应，已存在时覆盖"""
+        value = zlib.compress(_json_dumps(result))
+        with self._lock, self._conn:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO responses (key, value, created_at) VALUES (?, ?, ?)',
+                (key, value, int(time.time()))
+            )
+
+
+class _TCPAdapter(HTTPAdapter):
+    """为连接池中的套接字设置 TCP_NODELAY 和 SO_KEEPALIVE 的适配器"""
+    
+    def init_poolmanager(self, connections, maxsize, block=False, **pool_kwargs):
+        pool_kwargs.setdefault('socket_options', _SOCKET_OPTIONS)
+        super().init_poolmanager(connections, maxsize, block, **pool_kwargs)
+
+
+# 文档文本中连续的空格/制表符（含全角空格）、行首行尾空白和多余空行，内联到提示词前压缩以减少输入token
+_INLINE_SPACES_RE = re.compile(r'[ \t\u3000\xa0]+')
+_LINE_EDGE_SPACES_RE = re.compile(r' *\n *')
+_BLANK_LINES_RE = re.compile(r'\n{3,}')
+
+
+def _compact_text(text: str) -> str:
+    """压缩文档文本中的多余空白，保留换行和段落结构"""
+    text = _INLINE_SPACES_RE.sub(' ', text)
+    text = _LINE_EDGE_SPACES_RE.sub('\n', text)
+    return _BLANK_LINES_RE.sub('\n\n', text).strip()
+
+
+# 教学设计生成的指令提示词（双文件模式），学习材料和模板另以文件ID或正文内容提供
+_TEACHING_DESIGN_PROMPT = """好的，这是为您转换成中文的提示词。
+
+---
+
+### **中文提示词：**
+
+**角色：** 您是一位精通教学法和课程设计的专家。
+
+**任务：** 基于"思维发展型课堂"模型，根据用户提供的学习材料，创建一份全面、高质量的教学设计。
+
+**输入：**
+1. 一份由用户上传的，包含特定课程学习材料的Word文档。
+2. 一份固定的教学设计模板（即先前您学习过的模板）。
+
+**核心指令：**
+您的目标是仔细分析学习材料，并为模板中的**每一个板块**生成相关、创新且符合教学原理的内容。最终的输出必须严格遵守模板的结构；不得增加、删除或调整任何板块的顺序。模板中原有的所有标题和表格都必须完整地保留在您的最终输出中。
+
+**各板块内容生成指南：**
+
+1. **表头信息（`课例名称`、`学段年级`等）**
+   * **`课例名称`**：使用所提供学习材料的标题或核心主题。
+   * **`学段年级`**：根据材料内容的复杂程度，推断出最合适的学段年级（例如：小学一年级，初中二年级）。
+   * **`学科`**：识别出对应的学科（例如：语文、数学、历史）。
+   * **`教材版本`**：填写"根据所给材料"或在可能的情况下进行推断。
+   * **`课时说明`**：将本教案设计为1个课时（填写"第1课时"）。
+   * **`教师单位`**和**`教师姓名`**：保留为"XX学校"和"XX教师"。
+
+2. **【摘要】**
+   * 撰写一段300-500字的概括。首先，从材料中提炼课程的核心主题和目标。简要描述该主题的传统教学方法及其潜在的"痛点"（尤其是在核心素养培养方面）。然后，介绍您为本课设计的具体教学方法，阐述它将如何实现学习目标，以及它期望体现的特色（例如：注重探究、使用思维工具、合作学习等）。
+
+3. **【教学内容分析】**
+   * 分析所提供的文本。阐明其核心知识点和技能要求，并将其置于更广泛的课程体系中，解释它与学生先前所学和未来将学内容的联系。
+
+4. **【学习者分析】**
+   * 根据您所识别的学段年级，描述目标学生的典型特征。分析他们与本课主题相关的已有知识水平、认知发展阶段和学习特点。
+
+5. **【学习目标及重难点】**
+   * 制定3-4个具体、可测量、可达成的学习目标。
+   * 遵循模板附录中简化的ABCD模式。每个目标都应清晰地说明学生在课后能够**做什么**。
+   * 请使用具体的行为动词（如："列举"、"对比"、"设计"、"总结"），避免使用模糊的词汇（如："了解"、"知道"、"掌握"）。
+   * 在每个目标后，将主要学习目标标注为**（重点）**，将最具挑战性的目标标注为**（难点）**。
+
+6. **【课例结构】**
+   * 呈现您教学设计的整体结构和流程。可以使用文本格式，如编号列表或简单的流程图来概述主要阶段（例如：`导入 -> 新知探究 -> 巩固练习 -> 总结与拓展`）。
+
+7. **【学习活动设计】**
+   * 这是您任务的核心部分。设计一个详尽的、分步骤的教学过程。
+   * 创建几个清晰的"环节"，例如导入、主要活动、小组讨论和总结。
+   * 对于每个环节，填写表格，详细描述"教师活动"和相应的"学生活动"。
+   * 在每个环节的表格后，撰写清晰的"活动意图说明"，解释该环节的教学目的，以及它如何帮助学生达成学习目标。
+
+8. **【板书设计】**
+   * 用文本格式描述您将如何设计板书。使用标题和要点来展示在课程中，关键术语、图示和总结将被书写在黑板的哪个位置。
+
+9. **【作业与拓展学习设计】**
+   * 设计一到两个家庭作业或一项拓展学习活动，以巩固课上所学内容并鼓励学生进一步思考。
+
+10. **【素材设计】**
+    * 保留此标题。如果您构思了具体的学习单或练习纸，请简要描述其组成部分或问题。如果不需要额外材料，请直接陈述"本课未设计额外学习素材"。
+
+11. **【反思：思维训练点】**
+    * 回顾您刚刚创建的教学设计，并填写所提供的表格。
+    * **`认知冲突`**：在您的教学设计中，找出1-2个学生可能会遇到挑战性或反直觉观点的地方，这些地方能促使他们进行批判性思考。
+    * **`思维图示`**：找出1-2个在您的课程中使用了思维工具（如思维导图、流程图、对比图）的实例。
+    * **`变式运用`**：找出1-2个您通过变化的练习或案例来深化学生理解的例子。
+    * 在"说明"栏中，为每个要点提供简短的解释（100字以内）。
+
+---
+**最终指令：**
+现在，请开始分析用户上传的Word文档学习材料，并严格按照以上所有指南，生成一份完整的教学设计。"""
+
+
 class AliyunClient:
     """阿里云百炼API客户端"""
     
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(self, api_key: Optional[str] = None, cache: bool = False, cache_size: int = 1024,
+                 rpm: Optional[int] = None, cache_path: Optional[str] = None, cache_ttl: Optional[int] = None):
         """
         初始化阿里云客户端
         
         Args:
             api_key: 阿里云API密钥，如果不提供则从环境变量获取
+            cache: 是否缓存成功的响应，请求参数完全相同时直接返回缓存结果
+            cache_size: 缓存的最大条目数
+            rpm: 每分钟最多发出的模型调用次数，不提供则不限流
+            cache_path: 持久化缓存的SQLite文件路径，提供时自动开启缓存，重启后仍可命中
+            cache_ttl: 持久化缓存的有效期（秒），不提供则永不过期
         """
-        self.api_key = api_key or os.getenv("DASHSCOPE_API_KEY")
+        # 从 .env 等处读取的密钥可能带有首尾空白或换行，会使认证头无效
+        self.api_key = (api_key or os.getenv("DASHSCOPE_API_KEY") or "").strip()
         self.base_url = "https://dashscope.aliyuncs.com/compatible-mode/v1"
         
         if not self.api_key:
             raise ValueError("API Key未提供，请设置DASHSCOPE_API_KEY环境变量或传入api_key参数")
+        if not self.api_key.startswith("sk-"):
+            logger.warning("API Key格式可能不正确：百炼API Key通常以 sk- 开头")
+        
+        # 认证头预先编码为字节，每次请求发送时不再重复编码
+        auth_header = f'Bearer {self.api_key}'
+        try:
+            auth_header = auth_header.encode('ascii')
+        except UnicodeEncodeError:
+            pass
         
         self.session = requests.Session()
         self.session.headers.update({
-            'Authorization': f'Bearer {self.api_key}',
+            'Authorization': auth_header,
             'Content-Type': 'application/json'
         })
+        # 连接池足够容纳 call_batch 等并发请求，避免超出后反复建立、丢弃连接
+        adapter = _TCPAdapter(pool_connections=32, pool_maxsize=64, max_retries=_RETRY_POLICY)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        
+        self.reload_config()
+        
+        # OpenAI SDK客户端（可选依赖），首次上传时创建；upload_files 并行上传时加锁避免重复创建
+        self._openai_client = None
+        self._openai_client_lock = threading.Lock()
+        
+        # 已上传文件的结果，按文件内容和上传方式索引；同一模板反复使用时不再重复上传
+        self._upload_cache: Dict[tuple, Dict[str, Any]] = {}
+        self._upload_cache_lock = threading.Lock()
+        
+        # 模型调用限流，call_batch / acall_batch 并发时所有线程共享同一个令牌桶
+        self._rate_limiter = _RateLimiter(rpm) if rpm else None
+        
+        # 响应缓存（LRU），call_batch 等多线程调用时需加锁；配置 cache_path 时另有持久化的第二级缓存
+        self._cache: Optional[OrderedDict] = OrderedDict() if cache or cache_path else None
+        self._cache_size = cache_size
+        self._cache_lock = threading.Lock()
+        self._cache_store = _ResponseStore(cache_path, cache_ttl) if cache_path else None
         
         logger.info("✅ ALIYUN CLIENT INITIALIZED SUCCESSFULLY")
     
+    def reload_config(self):
+        """
+        读取并固定运行配置
+        
+        默认模型、生成参数和接口地址在初始化时读取一次，各请求直接使用，不再重复读取环境变量和解析数值。
+        修改环境变量或 base_url 后需显式调用本方法才会生效。
+        
+        Raises:
+            ValueError: 环境变量中的数值参数格式不正确
+        """
+        self._default_model = os.getenv("DEFAULT_MODEL", "qwen-max")
+        self._default_params = {
+            "temperature": float(os.getenv("TEMPERATURE", "0.7")),
+            "top_p": float(os.getenv("TOP_P", "0.8")),
+            "max_tokens": int(os.getenv("MAX_TOKENS", "2000"))
+        }
+        # 双文件模式需要更长的输出，可用MAX_TOKENS_LONG单独配置，否则沿用MAX_TOKENS，都未配置时默认4000
+        self._long_output_params = {
+            **self._default_params,
+            "max_tokens": int(os.getenv("MAX_TOKENS_LONG") or os.getenv("MAX_TOKENS", "4000"))
+        }
+        self._chat_url = f"{self.base_url}/chat/completions"
+        self._files_url = f"{self.base_url}/files"
+        self._batches_url = f"{self.base_url}/batches"
+    
+    def _wait_for_rate_limit(self):
+        """按RPM限制等待发出下一次模型调用"""
+        if self._rate_limiter is not None:
+            self._rate_limiter.acquire()
+    
+    def _cache_key(self, data: Dict[str, Any]) -> Optional[str]:
+        """根据请求数据生成缓存键，未启用缓存时返回None"""
+        if self._cache is None:
+            return None
+        return hashlib.blake2b(_json_dumps(data, sort_keys=True), digest_size=16).hexdigest()
+    
+    def _cache_get(self, key: Optional[str]) -> Optional[Dict[str, Any]]:
+        """读取缓存的响应副本"""
+        if key is None:
+            return None
+        with self._cache_lock:
+            result = self._cache.get(key)
+            if result is not None:
+                self._cache.move_to_end(key)
+        if result is None:
+            if self._cache_store is None:
+                return None
+            result = self._cache_store.get(key)
+            if result is None:
+                return None
+            self._cache_remember(key, result)
+        logger.info("♻️ USING CACHED RESPONSE")
+        return {**copy.deepcopy(result), 'cached': True}
+    
+    def _cache_put(self, key: Optional[str], result: Dict[str, Any]):
+        """缓存成功的响应"""
+        if key is None:
+            return
+        self._cache_remember(key, copy.deepcopy(result))
+        if self._cache_store is not None:
+            self._cache_store.put(key, result)
+    
+    def _cache_remember(self, key: str, result: Dict[str, Any]):
+        """将响应放入内存LRU缓存，超出容量时淘汰最久未使用的条目"""
+        with self._cache_lock:
+            self._cache[key] = result
+            self._cache.move_to_end(key)
+            if len(self._cache) > self._cache_size:
+                self._cache.popitem(last=False)
+    
+    def _post_chat(self, messages: List[Dict[str, str]], model: Optional[str] = None,
+                   parameters: Optional[Dict[str, Any]] = None, defaults: Optional[Dict[str, Any]] = None,
+                   use_cache: bool = False) -> Dict[str, Any]:
+        """
+        发送对话补全请求并解析结果，各对话方法共用
+        
+        网络异常不在此处捕获，由调用方决定重试或转换为错误结果。
+        
+        Args:
+            messages: 对话消息列表（OpenAI兼容格式）
+            model: 模型名称，默认使用 DEFAULT_MODEL
+            parameters: 额外参数，覆盖默认生成参数
+            defaults: 默认生成参数，默认为 self._default_params
+            use_cache: 是否使用响应缓存（需在初始化时开启缓存）
+            
+        Returns:
+            Dict[str, Any]: API响应结果
+        """
+        if model is None:
+            model = self._default_model
+        
+        data = {
+            "model": model,
+            "messages": messages,
+            **(defaults or self._default_params),
+            **(parameters or {})
+        }
+        
+        cache_key = self._cache_key(data) if use_cache else None
+        cached = self._cache_get(cache_key)
+        if cached is not None:
+            return cached
+        
+        logger.info(f"🚀 CALLING ALIYUN API: {self._chat_url}")
+        logger.debug("📤 REQUEST DATA: %s", _LazyJSON(data))
+        
+        self._wait_for_rate_limit()
+        response = self.session.post(self._chat_url, data=_json_dumps(data), timeout=120)
+        
+        if response.status_code != HTTPStatus.OK:
+            error_info = _error_result(response)
+            error_info['request_id'] = response.headers.get('X-Request-Id')
+            logger.error(f"API调用失败: {error_info}")
+            return error_info
+        
+        result = _json_loads(response.content)
+        logger.info("✅ API CALL SUCCESSFUL")
+        logger.debug("📥 RESPONSE DATA: %s", _LazyJSON(result))
+        
+        # 提取响应内容（OpenAI兼容格式）
+        choices = result.get('choices')
+        text = choices[0].get('message', {}).get('content', '') if choices else ''
+        
+        response_info = {
+            'success': True,
+            'data': result,
+            'request_id': result.get('id'),
+            'text': text,
+            'usage': result.get('usage', {}),
+            'model': result.get('model', model)
+        }
+        self._cache_put(cache_key, response_info)
+        return response_info
+    
     def call_model(self, prompt: str, model: Optional[str] = None, parameters: Optional[Dict[str, Any]] = None, max_retries: int = 2) -> Dict[str, Any]:
         """
         直接调用大模型进行对话
@@ -58,74 +685,15 @@ class AliyunClient:
         Returns:
             Dict[str, Any]: API响应结果
         """
-        # 重试逻辑
+        messages = [_user_message(prompt)]
+        
+        # 重试逻辑：只重试超时和网络异常，HTTP错误状态由连接池的重试策略处理
         for attempt in range(max_retries + 1):
             try:
-                # 使用环境变量中的默认模型
-                if model is None:
-                    model = os.getenv("DEFAULT_MODEL", "qwen-max")
-                
-                # 使用OpenAI兼容接口
-                url = f"{self.base_url}/chat/completions"
-                
-                # 构建请求数据，使用OpenAI兼容格式
-                data = {
-                    "model": model,
-                    "messages": [
-                        {
-                            "role": "user",
-                            "content": prompt
-                        }
-                    ],
-                    "temperature": float(os.getenv("TEMPERATURE", "0.7")),
-                    "top_p": float(os.getenv("TOP_P", "0.8")),
-                    "max_tokens": int(os.getenv("MAX_TOKENS", "2000")),
-                    **(parameters or {})
-                }
-                
-                logger.info(f"🚀 CALLING ALIYUN API (Attempt {attempt + 1}/{max_retries + 1}): {url}")
-                logger.debug(f"📤 REQUEST DATA: {json.dumps(data, ensure_ascii=False, indent=2)}")
+                if attempt > 0:
+                    logger.info(f"🔁 RETRYING ALIYUN API (Attempt {attempt + 1}/{max_retries + 1})")
                 
-                # 发送请求
-                response = self.session.post(url, json=data, timeout=120)
-                
-                # 处理响应
-                if response.status_code == HTTPStatus.OK:
-                    result = response.json()
-                    logger.info("✅ API CALL SUCCESSFUL")
-                    logger.debug(f"📥 RESPONSE DATA: {json.dumps(result, ensure_ascii=False, indent=2)}")
-                    
-                    # 提取响应内容（OpenAI兼容格式）
-                    choices = result.get('choices', [])
-                    if choices and len(choices) > 0:
-                        text = choices[0].get('message', {}).get('content', '')
-                    else:
-                        text = ''
-                    
-                    return {
-                        'success': True,
-                        'data': result,
-                        'request_id': result.get('id'),
-                        'text': text,
-                        'usage': result.get('usage', {}),
-                        'model': result.get('model', model)
-                    }
-                else:
-                    # 处理错误响应
-                    try:
-                        error_data = response.json()
-                        error_message = error_data.get('message', response.text)
-                    except:
-                        error_message = response.text
-                    
-                    error_info = {
-                        'success': False,
-                        'status_code': response.status_code,
-                        'message': error_message,
-                        'request_id': response.headers.get('X-Request-Id')
-                    }
-                    logger.error(f"API调用失败: {error_info}")
-                    return error_info
+                return self._post_chat(messages, model, parameters, use_cache=True)
                 
             except requests.exceptions.Timeout:
                 error_info = {
@@ -134,13 +702,6 @@ class AliyunClient:
                     'message': 'API调用超时，请稍后重试。建议检查网络连接或文件大小。'
                 }
                 logger.error(f"API调用超时 (尝试 {attempt + 1}/{max_retries + 1})")
-                
-                # 如果是最后一次尝试，返回错误
-                if attempt == max_retries:
-                    return error_info
-                else:
-                    logger.info(f"等待重试... (尝试 {attempt + 2}/{max_retries + 1})")
-                    continue
                     
             except requests.exceptions.RequestException as e:
                 error_info = {
@@ -149,13 +710,6 @@ class AliyunClient:
                     'message': f'网络请求失败: {str(e)}'
                 }
                 logger.error(f"API请求异常: {e}")
-                
-                # 如果是最后一次尝试，返回错误
-                if attempt == max_retries:
-                    return error_info
-                else:
-                    logger.info(f"等待重试... (尝试 {attempt + 2}/{max_retries + 1})")
-                    continue
                     
             except Exception as e:
                 error_info = {
@@ -165,6 +719,14 @@ class AliyunClient:
                 }
                 logger.error(f"未知错误: {e}")
                 return error_info
+            
+            # 如果是最后一次尝试，返回错误
+            if attempt == max_retries:
+                return error_info
+            
+            delay = _retry_delay(attempt)
+            logger.info(f"等待 {delay:.1f}s 后重试... (尝试 {attempt + 2}/{max_retries + 1})")
+            time.sleep(delay)
         
         # 如果所有重试都失败了
         return {
@@ -173,76 +735,119 @@ class AliyunClient:
             'message': f'API调用失败，已重试 {max_retries + 1} 次'
         }
 
-    def call_model_with_history(self, messages: List[Dict[str, str]], model: Optional[str] = None, 
-                               parameters: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    async def acall_model(self, prompt: str, model: Optional[str] = None, parameters: Optional[Dict[str, Any]] = None,
+                          max_retries: int = 2) -> Dict[str, Any]:
         """
-        支持多轮对话的模型调用
+        异步调用大模型，请求在线程中执行并复用同一个Session连接池
         
         Args:
-            messages: 对话历史，格式为 [{"role": "user", "content": "..."}, {"role": "assistant", "content": "..."}]
+            prompt: 输入提示词
             model: 模型名称
             parameters: 额外参数
             
         Returns:
             Dict[str, Any]: API响应结果
         """
-        try:
-            # 使用环境变量中的默认模型
-            if model is None:
-                model = os.getenv("DEFAULT_MODEL", "qwen-max")
-            
-            # 使用OpenAI兼容接口
-            url = f"{self.base_url}/chat/completions"
-            
-            # 构建请求数据（OpenAI兼容格式）
-            data = {
-                "model": model,
-                "messages": messages,
-                "temperature": float(os.getenv("TEMPERATURE", "0.7")),
-                "top_p": float(os.getenv("TOP_P", "0.8")),
-                "max_tokens": int(os.getenv("MAX_TOKENS", "2000")),
-                **(parameters or {})
-            }
+        return await _run_in_thread(self.call_model, prompt, model, parameters, max_retries)
+    
+    async def acall_batch(self, prompts: List[str], model: Optional[str] = None,
+                          parameters: Optional[Dict[str, Any]] = None, concurrency: int = 8) -> List[Dict[str, Any]]:
+        """
+        并发调用大模型处理多个提示词
+        
+        Args:
+            prompts: 提示词列表
+            model: 模型名称
+            parameters: 额外参数
+            concurrency: 最大并发请求数
             
-            logger.info(f"调用阿里云大模型API（多轮对话）: {url}")
-            logger.debug(f"请求数据: {json.dumps(data, ensure_ascii=False, indent=2)}")
+        Returns:
+            List[Dict[str, Any]]: 与prompts顺序一致的响应结果
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+        
+        async def call(prompt: str) -> Dict[str, Any]:
+            async with semaphore:
+                return await self.acall_model(prompt, model, parameters)
+        
+        return await asyncio.gather(*(call(prompt) for prompt in prompts))
+    
+    def call_batch(self, prompts: List[str], model: Optional[str] = None,
+                   parameters: Optional[Dict[str, Any]] = None, concurrency: int = 8) -> List[Dict[str, Any]]:
+        """
+        acall_batch 的同步版本，可在已有事件循环的环境中调用
+        
+        Args:
+            prompts: 提示词列表
+            model: 模型名称
+            parameters: 额外参数
+            concurrency: 最大并发请求数
             
-            # 发送请求
-            response = self.session.post(url, json=data, timeout=120)
+        Returns:
+            List[Dict[str, Any]]: 与prompts顺序一致的响应结果
+        """
+        if not prompts:
+            return []
+        
+        with ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(prompts)))) as executor:
+            return list(executor.map(lambda prompt: self.call_model(prompt, model, parameters), prompts))
+
+    def stream_model(self, prompt: str, model: Optional[str] = None,
+                     parameters: Optional[Dict[str, Any]] = None) -> Iterator[str]:
+        """
+        以流式方式调用大模型，边接收边返回生成的文本片段
+        
+        Args:
+            prompt: 输入提示词
+            model: 模型名称
+            parameters: 额外参数
             
-            # 处理响应（OpenAI兼容格式）
-            if response.status_code == HTTPStatus.OK:
-                result = response.json()
-                logger.info("API调用成功")
-                
-                # 提取响应内容（OpenAI兼容格式）
-                choices = result.get('choices', [])
-                if choices and len(choices) > 0:
-                    text = choices[0].get('message', {}).get('content', '')
-                else:
-                    text = ''
-                
-                return {
-                    'success': True,
-                    'data': result,
-                    'request_id': result.get('id'),
-                    'text': text,
-                    'usage': result.get('usage', {}),
-                    'model': result.get('model', model)
-                }
-            else:
-                try:
-                    error_data = response.json()
-                    error_message = error_data.get('message', response.text)
-                except:
-                    error_message = response.text
-                
-                return {
-                    'success': False,
-                    'status_code': response.status_code,
-                    'message': error_message,
-                    'request_id': response.headers.get('X-Request-Id')
-                }
+        Returns:
+            Iterator[str]: 依次生成的文本片段
+            
+        Raises:
+            requests.HTTPError: API返回非200状态码
+        """
+        if model is None:
+            model = self._default_model
+        
+        data = {
+            "model": model,
+            "messages": [_user_message(prompt)],
+            **self._default_params,
+            **(parameters or {}),
+            "stream": True
+        }
+        
+        logger.info(f"🚀 CALLING ALIYUN API (stream): {self._chat_url}")
+        
+        self._wait_for_rate_limit()
+        with self.session.post(self._chat_url, data=_json_dumps(data), timeout=120, stream=True) as response:
+            if response.status_code != HTTPStatus.OK:
+                error_message = _error_message(response)
+                logger.error(f"流式调用失败: {response.status_code} {error_message}")
+                raise requests.HTTPError(f"API调用失败 ({response.status_code}): {error_message}", response=response)
+            
+            for chunk_data in _iter_sse_chunks(response):
+                content = _chunk_content(chunk_data)
+                if content:
+                    yield content
+
+    def call_model_with_history(self, messages: List[Dict[str, str]], model: Optional[str] = None, 
+                               parameters: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        支持多轮对话的模型调用
+        
+        Args:
+            messages: 对话历史，格式为 [{"role": "user", "content": "..."}, {"role": "assistant", "content": "..."}]
+            model: 模型名称
+            parameters: 额外参数
+            
+        Returns:
+            Dict[str, Any]: API响应结果
+        """
+        try:
+            return self._post_chat(messages, model, parameters, use_cache=True)
                 
         except Exception as e:
             logger.error(f"多轮对话调用失败: {e}")
@@ -252,6 +857,39 @@ class AliyunClient:
                 'message': str(e)
             }
 
+    async def acall_model_with_history(self, messages: List[Dict[str, str]], model: Optional[str] = None,
+                                       parameters: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        call_model_with_history 的异步版本，多个对话可用 asyncio.gather 并发执行
+        
+        Args:
+            messages: 对话历史
+            model: 模型名称
+            parameters: 额外参数
+            
+        Returns:
+            Dict[str, Any]: API响应结果
+        """
+        return await _run_in_thread(self.call_model_with_history, messages, model, parameters)
+
+    def _post_file(self, file_name: str, file_obj, purpose: str, content_type: str) -> requests.Response:
+        """
+        以multipart/form-data上传文件，文件内容边读边发送
+        
+        Args:
+            file_name: 文件名
+            file_obj: 以二进制模式打开的可定位文件对象
+            purpose: 文件用途
+            content_type: 文件的MIME类型
+            
+        Returns:
+            requests.Response: 上传接口的响应
+        """
+        body = _MultipartFileBody({'purpose': purpose}, 'file', file_name, file_obj, content_type)
+        
+        # 复用Session连接池和认证头，Content-Type替换为multipart/form-data
+        return self.session.post(self._files_url, data=body, headers={'Content-Type': body.content_type}, timeout=120)
+    
     def upload_file(self, file_path: str, purpose: str = "file-extract") -> Dict[str, Any]:
         """
         上传文件到阿里云百炼（使用OpenAI兼容接口）
@@ -264,26 +902,13 @@ class AliyunClient:
             Dict[str, Any]: 上传结果
         """
         try:
-            url = f"{self.base_url}/files"
+            content_type = mimetypes.guess_type(file_path)[0] or _DEFAULT_UPLOAD_CONTENT_TYPE
             
-            # 准备文件上传
             with open(file_path, 'rb') as f:
-                files = {
-                    'file': (os.path.basename(file_path), f, 'application/vnd.openxmlformats-officedocument.wordprocessingml.document')
-                }
-                data = {
-                    'purpose': purpose
-                }
-                
-                # 移除Content-Type头，让requests自动设置multipart/form-data
-                headers = {
-                    'Authorization': f'Bearer {self.api_key}'
-                }
-                
-                response = requests.post(url, files=files, data=data, headers=headers, timeout=120)
+                response = self._post_file(os.path.basename(file_path), f, purpose, content_type)
             
             if response.status_code == HTTPStatus.OK:
-                result = response.json()
+                result = _json_loads(response.content)
                 return {
                     'success': True,
                     'file_id': result.get('id'),
@@ -293,17 +918,7 @@ class AliyunClient:
                     'data': result
                 }
             else:
-                try:
-                    error_data = response.json()
-                    error_message = error_data.get('message', response.text)
-                except:
-                    error_message = response.text
-                
-                return {
-                    'success': False,
-                    'status_code': response.status_code,
-                    'message': error_message
-                }
+                return _error_result(response)
                 
         except Exception as e:
             logger.error(f"文件上传失败: {e}")
@@ -313,6 +928,19 @@ class AliyunClient:
                 'message': str(e)
             }
 
+    def _get_openai_client(self):
+        """获取OpenAI客户端，首次使用时创建，之后复用其认证头和连接池"""
+        if self._openai_client is None:
+            with self._openai_client_lock:
+                if self._openai_client is None:
+                    from openai import OpenAI
+                    
+                    self._openai_client = OpenAI(
+                        api_key=self.api_key,
+                        base_url=self.base_url
+                    )
+        return self._openai_client
+    
     def upload_file_with_openai_client(self, file_path: str) -> Dict[str, Any]:
         """
         使用OpenAI客户端上传文件到阿里云百炼
@@ -324,14 +952,7 @@ class AliyunClient:
             Dict[str, Any]: 上传结果
         """
         try:
-            from openai import OpenAI
-            from pathlib import Path
-            
-            # 创建OpenAI客户端
-            client = OpenAI(
-                api_key=self.api_key,
-                base_url=self.base_url
-            )
+            client = self._get_openai_client()
             
             # 上传文件
             file_object = client.files.create(
@@ -357,6 +978,95 @@ class AliyunClient:
                 'message': str(e)
             }
     
+    def upload_file_cached(self, file_path: str, purpose: str = "file-extract",
+                           use_openai_client: bool = False) -> Dict[str, Any]:
+        """
+        上传文件，内容相同的文件只上传一次，之后直接返回已有的文件ID
+        
+        适用于模板等反复使用的文件；服务端删除文件后需调用 clear_upload_cache 重新上传。
+        
+        Args:
+            file_path: 文件路径
+            purpose: 文件用途，仅 upload_file 方式使用
+            use_openai_client: 是否通过 upload_file_with_openai_client 上传
+            
+        Returns:
+            Dict[str, Any]: 上传结果，命中缓存时带有 'cached': True
+        """
+        try:
+            key = (_file_sha256(file_path), purpose, use_openai_client)
+        except OSError as e:
+            logger.error(f"文件上传失败: {e}")
+            return {
+                'success': False,
+                'error': 'upload_failed',
+                'message': str(e)
+            }
+        
+        with self._upload_cache_lock:
+            cached = self._upload_cache.get(key)
+        if cached is not None:
+            logger.info(f"♻️ USING UPLOADED FILE: {cached['file_id']}")
+            return {**cached, 'cached': True}
+        
+        if use_openai_client:
+            result = self.upload_file_with_openai_client(file_path)
+        else:
+            result = self.upload_file(file_path, purpose)
+        
+        if result['success']:
+            with self._upload_cache_lock:
+                self._upload_cache[key] = result
+        return result
+    
+    def clear_upload_cache(self):
+        """清空已上传文件的缓存"""
+        with self._upload_cache_lock:
+            self._upload_cache.clear()
+    
+    def upload_files(self, file_paths: List[str], purpose: str = "file-extract",
+                     use_openai_client: bool = False, cache: bool = False) -> List[Dict[str, Any]]:
+        """
+        并行上传多个文件（如用户文件和模板文件），总耗时接近其中最慢的一个
+        
+        Args:
+            file_paths: 文件路径列表
+            purpose: 文件用途，仅 upload_file 方式使用
+            use_openai_client: 是否通过 upload_file_with_openai_client 上传
+            cache: 是否复用内容相同文件的上传结果（见 upload_file_cached）
+            
+        Returns:
+            List[Dict[str, Any]]: 与file_paths顺序一致的上传结果
+        """
+        if not file_paths:
+            return []
+        
+        if cache:
+            upload = lambda file_path: self.upload_file_cached(file_path, purpose, use_openai_client)
+        elif use_openai_client:
+            upload = self.upload_file_with_openai_client
+        else:
+            upload = lambda file_path: self.upload_file(file_path, purpose)
+        
+        with ThreadPoolExecutor(max_workers=len(file_paths)) as executor:
+            return list(executor.map(upload, file_paths))
+    
+    async def aupload_files(self, file_paths: List[str], purpose: str = "file-extract",
+                            use_openai_client: bool = False, cache: bool = False) -> List[Dict[str, Any]]:
+        """
+        upload_files 的异步版本
+        
+        Args:
+            file_paths: 文件路径列表
+            purpose: 文件用途，仅 upload_file 方式使用
+            use_openai_client: 是否通过 upload_file_with_openai_client 上传
+            cache: 是否复用内容相同文件的上传结果
+            
+        Returns:
+            List[Dict[str, Any]]: 与file_paths顺序一致的上传结果
+        """
+        return await _run_in_thread(self.upload_files, file_paths, purpose, use_openai_client, cache)
+    
     def chat_with_file(self, file_id: str, user_message: str, model: Optional[str] = None) -> Dict[str, Any]:
         """
         使用文件进行对话
@@ -370,60 +1080,8 @@ class AliyunClient:
             Dict[str, Any]: 对话结果
         """
         try:
-            if model is None:
-                model = os.getenv("DEFAULT_MODEL", "qwen-max")
-            
-            url = f"{self.base_url}/chat/completions"
-            
-            # 构建请求数据
-            data = {
-                "model": model,
-                "messages": [
-                    {
-                        "role": "system",
-                        "content": f"fileid://{file_id}"
-                    },
-                    {
-                        "role": "user",
-                        "content": user_message
-                    }
-                ],
-                "temperature": float(os.getenv("TEMPERATURE", "0.7")),
-                "top_p": float(os.getenv("TOP_P", "0.8")),
-                "max_tokens": int(os.getenv("MAX_TOKENS", "2000"))
-            }
-            
-            response = self.session.post(url, json=data, timeout=120)
-            
-            if response.status_code == HTTPStatus.OK:
-                result = response.json()
-                
-                choices = result.get('choices', [])
-                if choices and len(choices) > 0:
-                    text = choices[0].get('message', {}).get('content', '')
-                else:
-                    text = ''
-                
-                return {
-                    'success': True,
-                    'data': result,
-                    'request_id': result.get('id'),
-                    'text': text,
-                    'usage': result.get('usage', {}),
-                    'model': result.get('model', model)
-                }
-            else:
-                try:
-                    error_data = response.json()
-                    error_message = error_data.get('message', response.text)
-                except:
-                    error_message = response.text
-                
-                return {
-                    'success': False,
-                    'status_code': response.status_code,
-                    'message': error_message
-                }
+            messages = [_file_message(file_id), _user_message(user_message)]
+            return self._post_chat(messages, model, use_cache=True)
                 
         except Exception as e:
             logger.error(f"文件对话失败: {e}")
@@ -434,7 +1092,8 @@ class AliyunClient:
             }
 
     def chat_with_qwen_long_and_files(self, user_file_id: str, template_file_id: str, 
-                                     model: str = "qwen-long") -> Dict[str, Any]:
+                                     model: str = "qwen-long",
+                                     stream_callback: Optional[Callable[[str], None]] = None) -> Dict[str, Any]:
         """
         使用Qwen-Long模型和两个文件进行教学设计生成
         
@@ -442,109 +1101,25 @@ class AliyunClient:
             user_file_id: 用户上传文件的ID
             template_file_id: 模板文件的ID
             model: 模型名称，默认为qwen-long
+            stream_callback: 每收到一段生成文本时调用，用于实时显示生成进度
             
         Returns:
             Dict[str, Any]: 对话结果
         """
         try:
-            # 构建包含两个文件ID的提示词
-            prompt = """好的，这是为您转换成中文的提示词。
-
----
-
-### **中文提示词：**
-
-**角色：** 您是一位精通教学法和课程设计的专家。
-
-**任务：** 基于"思维发展型课堂"模型，根据用户提供的学习材料，创建一份全面、高质量的教学设计。
-
-**输入：**
-1. 一份由用户上传的，包含特定课程学习材料的Word文档。
-2. 一份固定的教学设计模板（即先前您学习过的模板）。
-
-**核心指令：**
-您的目标是仔细分析学习材料，并为模板中的**每一个板块**生成相关、创新且符合教学原理的内容。最终的输出必须严格遵守模板的结构；不得增加、删除或调整任何板块的顺序。模板中原有的所有标题和表格都必须完整地保留在您的最终输出中。
-
-**各板块内容生成指南：**
-
-1. **表头信息（`课例名称`、`学段年级`等）**
-   * **`课例名称`**：使用所提供学习材料的标题或核心主题。
-   * **`学段年级`**：根据材料内容的复杂程度，推断出最合适的学段年级（例如：小学一年级，初中二年级）。
-   * **`学科`**：识别出对应的学科（例如：语文、数学、历史）。
-   * **`教材版本`**：填写"根据所给材料"或在可能的情况下进行推断。
-   * **`课时说明`**：将本教案设计为1个课时（填写"第1课时"）。
-   * **`教师单位`**和**`教师姓名`**：保留为"XX学校"和"XX教师"。
-
-2. **【摘要】**
-   * 撰写一段300-500字的概括。首先，从材料中提炼课程的核心主题和目标。简要描述该主题的传统教学方法及其潜在的"痛点"（尤其是在核心素养培养方面）。然后，介绍您为本课设计的具体教学方法，阐述它将如何实现学习目标，以及它期望体现的特色（例如：注重探究、使用思维工具、合作学习等）。
-
-3. **【教学内容分析】**
-   * 分析所提供的文本。阐明其核心知识点和技能要求，并将其置于更广泛的课程体系中，解释它与学生先前所学和未来将学内容的联系。
-
-4. **【学习者分析】**
-   * 根据您所识别的学段年级，描述目标学生的典型特征。分析他们与本课主题相关的已有知识水平、认知发展阶段和学习特点。
-
-5. **【学习目标及重难点】**
-   * 制定3-4个具体、可测量、可达成的学习目标。
-   * 遵循模板附录中简化的ABCD模式。每个目标都应清晰地说明学生在课后能够**做什么**。
-   * 请使用具体的行为动词（如："列举"、"对比"、"设计"、"总结"），避免使用模糊的词汇（如："了解"、"知道"、"掌握"）。
-   * 在每个目标后，将主要学习目标标注为**（重点）**，将最具挑战性的目标标注为**（难点）**。
-
-6. **【课例结构】**
-   * 呈现您教学设计的整体结构和流程。可以使用文本格式，如编号列表或简单的流程图来概述主要阶段（例如：`导入 -> 新知探究 -> 巩固练习 -> 总结与拓展`）。
-
-7. **【学习活动设计】**
-   * 这是您任务的核心部分。设计一个详尽的、分步骤的教学过程。
-   * 创建几个清晰的"环节"，例如导入、主要活动、小组讨论和总结。
-   * 对于每个环节，填写表格，详细描述"教师活动"和相应的"学生活动"。
-   * 在每个环节的表格后，撰写清晰的"活动意图说明"，解释该环节的教学目的，以及它如何帮助学生达成学习目标。
-
-8. **【板书设计】**
-   * 用文本格式描述您将如何设计板书。使用标题和要点来展示在课程中，关键术语、图示和总结将被书写在黑板的哪个位置。
-
-9. **【作业与拓展学习设计】**
-   * 设计一到两个家庭作业或一项拓展学习活动，以巩固课上所学内容并鼓励学生进一步思考。
-
-10. **【素材设计】**
-    * 保留此标题。如果您构思了具体的学习单或练习纸，请简要描述其组成部分或问题。如果不需要额外材料，请直接陈述"本课未设计额外学习素材"。
-
-11. **【反思：思维训练点】**
-    * 回顾您刚刚创建的教学设计，并填写所提供的表格。
-    * **`认知冲突`**：在您的教学设计中，找出1-2个学生可能会遇到挑战性或反直觉观点的地方，这些地方能促使他们进行批判性思考。
-    * **`思维图示`**：找出1-2个在您的课程中使用了思维工具（如思维导图、流程图、对比图）的实例。
-    * **`变式运用`**：找出1-2个您通过变化的练习或案例来深化学生理解的例子。
-    * 在"说明"栏中，为每个要点提供简短的解释（100字以内）。
-
----
-**最终指令：**
-现在，请开始分析用户上传的Word文档学习材料，并严格按照以上所有指南，生成一份完整的教学设计。"""
-
-            url = f"{self.base_url}/chat/completions"
+            url = self._chat_url
             
-            # 构建请求数据，使用两个文件ID
+            # 构建请求数据，使用两个文件ID；模板在前、用户文件在后，
+            # 使每次请求的消息前缀相同，便于服务端复用前缀缓存
             data = {
                 "model": model,
                 "messages": [
-                    {
-                        "role": "system",
-                        "content": "You are a helpful assistant."
-                    },
-                    {
-                        "role": "system",
-                        "content": f"fileid://{user_file_id}"
-                    },
-                    {
-                        "role": "system", 
-                        "content": f"fileid://{template_file_id}"
-                    },
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
+                    _ASSISTANT_SYSTEM_MESSAGE,
+                    _file_message(template_file_id),
+                    _file_message(user_file_id),
+                    _user_message(_TEACHING_DESIGN_PROMPT)
                 ],
-                "temperature": float(os.getenv("TEMPERATURE", "0.7")),
-                "top_p": float(os.getenv("TOP_P", "0.8")),
-                "max_tokens": int(os.getenv("MAX_TOKENS", "4000")),
+                **self._long_output_params,
                 "stream": True,
                 "stream_options": {
                     "include_usage": True
@@ -552,51 +1127,34 @@ class AliyunClient:
             }
             
             logger.info(f"调用Qwen-Long模型API（双文件模式）: {url}")
-            logger.debug(f"请求数据: {json.dumps(data, ensure_ascii=False, indent=2)}")
-            
-            # 发送请求
-            response = self.session.post(url, json=data, timeout=120, stream=True)
+            logger.debug("请求数据: %s", _LazyJSON(data))
             
-            # 处理流式响应
-            if response.status_code == HTTPStatus.OK:
-                full_content = ""
-                usage_info = {}
+            # 发送请求，响应读完或中途出错时都关闭，连接归还连接池
+            self._wait_for_rate_limit()
+            with self.session.post(url, data=_json_dumps(data), timeout=120, stream=True) as response:
+                # 处理流式响应
+                if response.status_code == HTTPStatus.OK:
+                    content_parts = []
+                    usage_info = {}
                 
-                for line in response.iter_lines():
-                    if line:
-                        line_str = line.decode('utf-8')
-                        if line_str.startswith('data: '):
-                            data_str = line_str[6:]
-                            if data_str.strip() == '[DONE]':
-                                break
-                            try:
-                                chunk_data = json.loads(data_str)
-                                if chunk_data.get('choices') and chunk_data['choices'][0].get('delta', {}).get('content'):
-                                    full_content += chunk_data['choices'][0]['delta']['content']
-                                if chunk_data.get('usage'):
-                                    usage_info = chunk_data['usage']
-                            except json.JSONDecodeError:
-                                continue
+                    for chunk_data in _iter_sse_chunks(response):
+                        content = _chunk_content(chunk_data)
+                        if content:
+                            content_parts.append(content)
+                            if stream_callback is not None:
+                                stream_callback(content)
+                        if chunk_data.get('usage'):
+                            usage_info = chunk_data['usage']
                 
-                return {
-                    'success': True,
-                    'text': full_content,
-                    'usage': usage_info,
-                    'model': model,
-                    'request_id': response.headers.get('X-Request-Id')
-                }
-            else:
-                try:
-                    error_data = response.json()
-                    error_message = error_data.get('message', response.text)
-                except:
-                    error_message = response.text
-                
-                return {
-                    'success': False,
-                    'status_code': response.status_code,
-                    'message': error_message
-                }
+                    return {
+                        'success': True,
+                        'text': ''.join(content_parts),
+                        'usage': usage_info,
+                        'model': model,
+                        'request_id': response.headers.get('X-Request-Id')
+                    }
+                else:
+                    return _error_result(response)
                 
         except Exception as e:
             logger.error(f"Qwen-Long双文件模式调用失败: {e}")
@@ -607,169 +1165,276 @@ class AliyunClient:
             }
 
     def call_model_with_files(self, user_file_content: str, template_file_content: str, 
-                             model: Optional[str] = None, parameters: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+                             model: Optional[str] = None, parameters: Optional[Dict[str, Any]] = None,
+                             max_input_chars: Optional[int] = None) -> Dict[str, Any]:
         """
         使用用户文件和模板文件内容调用大模型
         
+        两份文本内联到提示词前先压缩多余空白，减少输入token。
+        
         Args:
             user_file_content: 用户上传文件的文本内容
             template_file_content: 模板文件的文本内容
             model: 模型名称
             parameters: 额外参数
+            max_input_chars: 用户文件内容的最大字符数，超出部分截断，不提供则不截断
             
         Returns:
             Dict[str, Any]: API响应结果
         """
         try:
-            # 使用环境变量中的默认模型
-            if model is None:
-                model = os.getenv("DEFAULT_MODEL", "qwen-max")
+            user_file_content = _compact_text(user_file_content)
+            template_file_content = _compact_text(template_file_content)
+            if max_input_chars is not None and len(user_file_content) > max_input_chars:
+                logger.warning(f"用户文件内容过长（{len(user_file_content)}字符），截断为前{max_input_chars}字符")
+                user_file_content = user_file_content[:max_input_chars]
             
-            # 构建包含两个文件内容的提示词
-            prompt = f"""好的，这是为您转换成中文的提示词。
-
----
-
-### **中文提示词：**
-
-**角色：** 您是一位精通教学法和课程设计的专家。
-
-**任务：** 基于"思维发展型课堂"模型，根据用户提供的学习材料，创建一份全面、高质量的教学设计。
-
-**输入：**
-1. 一份由用户上传的，包含特定课程学习材料的Word文档。
-2. 一份固定的教学设计模板（即先前您学习过的模板）。
-
-**核心指令：**
-您的目标是仔细分析学习材料，并为模板中的**每一个板块**生成相关、创新且符合教学原理的内容。最终的输出必须严格遵守模板的结构；不得增加、删除或调整任何板块的顺序。模板中原有的所有标题和表格都必须完整地保留在您的最终输出中。
-
-**各板块内容生成指南：**
-
-1. **表头信息（`课例名称`、`学段年级`等）**
-   * **`课例名称`**：使用所提供学习材料的标题或核心主题。
-   * **`学段年级`**：根据材料内容的复杂程度，推断出最合适的学段年级（例如：小学一年级，初中二年级）。
-   * **`学科`**：识别出对应的学科（例如：语文、数学、历史）。
-   * **`教材版本`**：填写"根据所给材料"或在可能的情况下进行推断。
-   * **`课时说明`**：将本教案设计为1个课时（填写"第1课时"）。
-   * **`教师单位`**和**`教师姓名`**：保留为"XX学校"和"XX教师"。
-
-2. **【摘要】**
-   * 撰写一段300-500字的概括。首先，从材料中提炼课程的核心主题和目标。简要描述该主题的传统教学方法及其潜在的"痛点"（尤其是在核心素养培养方面）。然后，介绍您为本课设计的具体教学方法，阐述它将如何实现学习目标，以及它期望体现的特色（例如：注重探究、使用思维工具、合作学习等）。
-
-3. **【教学内容分析】**
-   * 分析所提供的文本。阐明其核心知识点和技能要求，并将其置于更广泛的课程体系中，解释它与学生先前所学和未来将学内容的联系。
-
-4. **【学习者分析】**
-   * 根据您所识别的学段年级，描述目标学生的典型特征。分析他们与本课主题相关的已有知识水平、认知发展阶段和学习特点。
-
-5. **【学习目标及重难点】**
-   * 制定3-4个具体、可测量、可达成的学习目标。
-   * 遵循模板附录中简化的ABCD模式。每个目标都应清晰地说明学生在课后能够**做什么**。
-   * 请使用具体的行为动词（如："列举"、"对比"、"设计"、"总结"），避免使用模糊的词汇（如："了解"、"知道"、"掌握"）。
-   * 在每个目标后，将主要学习目标标注为**（重点）**，将最具挑战性的目标标注为**（难点）**。
-
-6. **【课例结构】**
-   * 呈现您教学设计的整体结构和流程。可以使用文本格式，如编号列表或简单的流程图来概述主要阶段（例如：`导入 -> 新知探究 -> 巩固练习 -> 总结与拓展`）。
-
-7. **【学习活动设计】**
-   * 这是您任务的核心部分。设计一个详尽的、分步骤的教学过程。
-   * 创建几个清晰的"环节"，例如导入、主要活动、小组讨论和总结。
-   * 对于每个环节，填写表格，详细描述"教师活动"和相应的"学生活动"。
-   * 在每个环节的表格后，撰写清晰的"活动意图说明"，解释该环节的教学目的，以及它如何帮助学生达成学习目标。
-
-8. **【板书设计】**
-   * 用文本格式描述您将如何设计板书。使用标题和要点来展示在课程中，关键术语、图示和总结将被书写在黑板的哪个位置。
-
-9. **【作业与拓展学习设计】**
-   * 设计一到两个家庭作业或一项拓展学习活动，以巩固课上所学内容并鼓励学生进一步思考。
-
-10. **【素材设计】**
-    * 保留此标题。如果您构思了具体的学习单或练习纸，请简要描述其组成部分或问题。如果不需要额外材料，请直接陈述"本课未设计额外学习素材"。
+            # 构建包含两个文件内容的提示词，固定的指令部分在前，各次请求的前缀保持一致
+            prompt = (f"{_TEACHING_DESIGN_PROMPT}\n\n---\n\n**用户上传的学习材料内容：**\n{user_file_content}"
+                      f"\n\n---\n\n**教学设计模板内容：**\n{template_file_content}")
 
-11. **【反思：思维训练点】**
-    * 回顾您刚刚创建的教学设计，并填写所提供的表格。
-    * **`认知冲突`**：在您的教学设计中，找出1-2个学生可能会遇到挑战性或反直觉观点的地方，这些地方能促使他们进行批判性思考。
-    * **`思维图示`**：找出1-2个在您的课程中使用了思维工具（如思维导图、流程图、对比图）的实例。
-    * **`变式运用`**：找出1-2个您通过变化的练习或案例来深化学生理解的例子。
-    * 在"说明"栏中，为每个要点提供简短的解释（100字以内）。
-
----
-**最终指令：**
-现在，请开始分析用户上传的Word文档学习材料，并严格按照以上所有指南，生成一份完整的教学设计。
-
----
-
-**用户上传的学习材料内容：**
-{user_file_content}
-
----
+            messages = [_user_message(prompt)]
+            # 增加token限制以支持更长的输出；同一文档重复生成时可直接使用缓存结果
+            return self._post_chat(messages, model, parameters, defaults=self._long_output_params,
+                                   use_cache=True)
+                
+        except Exception as e:
+            logger.error(f"双文件模式调用失败: {e}")
+            return {
+                'success': False,
+                'error': 'unknown_error',
+                'message': str(e)
+            }
 
-**教学设计模板内容：**
-{template_file_content}"""
+    async def acall_model_with_files(self, user_file_content: str, template_file_content: str,
+                                     model: Optional[str] = None,
+                                     parameters: Optional[Dict[str, Any]] = None,
+                                     max_input_chars: Optional[int] = None) -> Dict[str, Any]:
+        """
+        call_model_with_files 的异步版本，批量生成教学设计时可用 asyncio.gather 并发执行
+        
+        Args:
+            user_file_content: 用户上传文件的文本内容
+            template_file_content: 模板文件的文本内容
+            model: 模型名称
+            parameters: 额外参数
+            max_input_chars: 用户文件内容的最大字符数
+            
+        Returns:
+            Dict[str, Any]: API响应结果
+        """
+        return await _run_in_thread(self.call_model_with_files, user_file_content, template_file_content,
+                                    model, parameters, max_input_chars)
 
-            # 使用OpenAI兼容接口
-            url = f"{self.base_url}/chat/completions"
+    def generate_from_file(self, file_path: str, user_message: str, model: Optional[str] = None,
+                           use_openai_client: bool = False) -> Dict[str, Any]:
+        """
+        上传文件后立即基于该文件对话，内容未变的文件复用之前的上传结果
+        
+        Args:
+            file_path: 文件路径
+            user_message: 用户消息
+            model: 模型名称
+            use_openai_client: 是否通过 upload_file_with_openai_client 上传
             
-            # 构建请求数据
-            data = {
-                "model": model,
-                "messages": [
-                    {
-                        "role": "user",
-                        "content": prompt
+        Returns:
+            Dict[str, Any]: 对话结果；上传失败时为上传结果
+        """
+        upload_result = self.upload_file_cached(file_path, use_openai_client=use_openai_client)
+        if not upload_result['success']:
+            return upload_result
+        
+        return self.chat_with_file(upload_result['file_id'], user_message, model)
+    
+    async def agenerate_from_file(self, file_path: str, user_message: str, model: Optional[str] = None,
+                                  use_openai_client: bool = False) -> Dict[str, Any]:
+        """
+        generate_from_file 的异步版本
+        
+        Args:
+            file_path: 文件路径
+            user_message: 用户消息
+            model: 模型名称
+            use_openai_client: 是否通过 upload_file_with_openai_client 上传
+            
+        Returns:
+            Dict[str, Any]: 对话结果；上传失败时为上传结果
+        """
+        return await _run_in_thread(self.generate_from_file, file_path, user_message, model, use_openai_client)
+    
+    def generate_from_two_files(self, user_file_path: str, template_file_path: str, model: str = "qwen-long",
+                                use_openai_client: bool = False,
+                                stream_callback: Optional[Callable[[str], None]] = None) -> Dict[str, Any]:
+        """
+        并行上传用户文件和模板文件，随后以Qwen-Long双文件模式生成教学设计
+        
+        Args:
+            user_file_path: 用户文件路径
+            template_file_path: 模板文件路径
+            model: 模型名称，默认为qwen-long
+            use_openai_client: 是否通过 upload_file_with_openai_client 上传
+            stream_callback: 每收到一段生成文本时调用
+            
+        Returns:
+            Dict[str, Any]: 对话结果，附带两个文件ID；上传失败时为失败的上传结果
+        """
+        user_upload, template_upload = self.upload_files(
+            [user_file_path, template_file_path], use_openai_client=use_openai_client, cache=True
+        )
+        for upload_result in (user_upload, template_upload):
+            if not upload_result['success']:
+                return upload_result
+        
+        result = self.chat_with_qwen_long_and_files(
+            user_upload['file_id'], template_upload['file_id'], model, stream_callback
+        )
+        result['user_file_id'] = user_upload['file_id']
+        result['template_file_id'] = template_upload['file_id']
+        return result
+    
+    async def agenerate_from_two_files(self, user_file_path: str, template_file_path: str,
+                                       model: str = "qwen-long", use_openai_client: bool = False,
+                                       stream_callback: Optional[Callable[[str], None]] = None) -> Dict[str, Any]:
+        """
+        generate_from_two_files 的异步版本
+        
+        Args:
+            user_file_path: 用户文件路径
+            template_file_path: 模板文件路径
+            model: 模型名称，默认为qwen-long
+            use_openai_client: 是否通过 upload_file_with_openai_client 上传
+            stream_callback: 每收到一段生成文本时调用（在工作线程中调用）
+            
+        Returns:
+            Dict[str, Any]: 对话结果，附带两个文件ID；上传失败时为失败的上传结果
+        """
+        return await _run_in_thread(self.generate_from_two_files, user_file_path, template_file_path,
+                                    model, use_openai_client, stream_callback)
+    
+    def submit_batch(self, prompts: List[str], model: Optional[str] = None,
+                     parameters: Optional[Dict[str, Any]] = None, completion_window: str = "24h") -> Dict[str, Any]:
+        """
+        通过批处理接口提交大量提示词，适合不要求实时返回的离线任务
+        
+        请求写成JSONL文件上传后创建批处理任务，由服务端排队执行，不占用实时调用的限流额度。
+        
+        Args:
+            prompts: 提示词列表，结果按 custom_id（req-序号）对应
+            model: 模型名称
+            parameters: 额外参数
+            completion_window: 任务完成时限
+            
+        Returns:
+            Dict[str, Any]: 提交结果，成功时包含 batch_id
+        """
+        try:
+            if model is None:
+                model = self._default_model
+            
+            requests_jsonl = b'\n'.join(
+                _json_dumps({
+                    "custom_id": f"req-{i}",
+                    "method": "POST",
+                    "url": "/v1/chat/completions",
+                    "body": {
+                        "model": model,
+                        "messages": [_user_message(prompt)],
+                        **self._default_params,
+                        **(parameters or {})
                     }
-                ],
-                "temperature": float(os.getenv("TEMPERATURE", "0.7")),
-                "top_p": float(os.getenv("TOP_P", "0.8")),
-                "max_tokens": int(os.getenv("MAX_TOKENS", "4000")),  # 增加token限制以支持更长的输出
-                **(parameters or {})
+                })
+                for i, prompt in enumerate(prompts)
+            )
+            
+            response = self._post_file("batch.jsonl", io.BytesIO(requests_jsonl), "batch", "application/jsonl")
+            if response.status_code != HTTPStatus.OK:
+                return _error_result(response)
+            input_file_id = _json_loads(response.content).get('id')
+            
+            response = self.session.post(self._batches_url, data=_json_dumps({
+                "input_file_id": input_file_id,
+                "endpoint": "/v1/chat/completions",
+                "completion_window": completion_window
+            }), timeout=120)
+            if response.status_code != HTTPStatus.OK:
+                return _error_result(response)
+            
+            result = _json_loads(response.content)
+            logger.info(f"✅ BATCH SUBMITTED: {result.get('id')} ({len(prompts)} requests)")
+            return {
+                'success': True,
+                'batch_id': result.get('id'),
+                'input_file_id': input_file_id,
+                'status': result.get('status'),
+                'data': result
             }
             
-            logger.info(f"调用阿里云大模型API（双文件模式）: {url}")
-            logger.debug(f"请求数据: {json.dumps(data, ensure_ascii=False, indent=2)}")
+        except Exception as e:
+            logger.error(f"批处理任务提交失败: {e}")
+            return {
+                'success': False,
+                'error': 'batch_submit_failed',
+                'message': str(e)
+            }
+    
+    def poll_batch(self, batch_id: str) -> Dict[str, Any]:
+        """
+        查询批处理任务状态，任务完成时下载并解析结果
+        
+        Args:
+            batch_id: submit_batch 返回的任务ID
             
-            # 发送请求
-            response = self.session.post(url, json=data, timeout=120)  # 增加超时时间
+        Returns:
+            Dict[str, Any]: 任务状态；status为completed时 results 按提交顺序给出每个请求的结果
+        """
+        try:
+            response = self.session.get(f"{self._batches_url}/{batch_id}", timeout=120)
+            if response.status_code != HTTPStatus.OK:
+                return _error_result(response)
+            
+            batch = _json_loads(response.content)
+            batch_info = {
+                'success': True,
+                'batch_id': batch_id,
+                'status': batch.get('status'),
+                'request_counts': batch.get('request_counts', {}),
+                'data': batch
+            }
+            
+            output_file_id = batch.get('output_file_id')
+            if batch_info['status'] != 'completed' or not output_file_id:
+                return batch_info
+            
+            response = self.session.get(f"{self._files_url}/{output_file_id}/content", timeout=120)
+            if response.status_code != HTTPStatus.OK:
+                return _error_result(response)
+            
+            # 结果文件每行一个请求，顺序不保证与提交顺序一致
+            results = []
+            for line in response.content.splitlines():
+                if not line.strip():
+                    continue
+                item = _json_loads(line)
+                item_response = item.get('response') or {}
+                body = item_response.get('body') or {}
+                choices = body.get('choices')
+                results.append({
+                    'custom_id': item.get('custom_id'),
+                    'success': item_response.get('status_code') == HTTPStatus.OK,
+                    'text': choices[0].get('message', {}).get('content', '') if choices else '',
+                    'usage': body.get('usage', {}),
+                    'error': item.get('error')
+                })
+            results.sort(key=lambda result: int(result['custom_id'].rpartition('-')[2]))
+            
+            batch_info['results'] = results
+            return batch_info
             
-            # 处理响应
-            if response.status_code == HTTPStatus.OK:
-                result = response.json()
-                logger.info("API调用成功")
-                
-                # 提取响应内容（OpenAI兼容格式）
-                choices = result.get('choices', [])
-                if choices and len(choices) > 0:
-                    text = choices[0].get('message', {}).get('content', '')
-                else:
-                    text = ''
-                
-                return {
-                    'success': True,
-                    'data': result,
-                    'request_id': result.get('id'),
-                    'text': text,
-                    'usage': result.get('usage', {}),
-                    'model': result.get('model', model)
-                }
-            else:
-                try:
-                    error_data = response.json()
-                    error_message = error_data.get('message', response.text)
-                except:
-                    error_message = response.text
-                
-                return {
-                    'success': False,
-                    'status_code': response.status_code,
-                    'message': error_message,
-                    'request_id': response.headers.get('X-Request-Id')
-                }
-                
         except Exception as e:
-            logger.error(f"双文件模式调用失败: {e}")
+            logger.error(f"批处理任务查询失败: {e}")
             return {
                 'success': False,
-                'error': 'unknown_error',
+                'error': 'batch_poll_failed',
                 'message': str(e)
             }
 
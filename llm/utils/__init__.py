@@ -4,8 +4,9 @@
 提供基本的文件处理功能。
 """
 
-from .file_handler import FileHandler
+from .file_handler import FileHandler, get_file_handler
 
 __all__ = [
-    'FileHandler'
+    'FileHandler',
+    'get_file_handler'
 ]
\ No newline at end of file
@@ -5,41 +5,133 @@
 """
 
 import os
-from typing import Dict, Any, Optional
+import time
+import logging
+import zipfile
+import threading
+import xml.etree.ElementTree as ET
+from collections import OrderedDict
+from typing import Dict, Any, BinaryIO, Optional, Tuple
 from datetime import datetime
-import uuid
+import secrets
+import functools
 
-# 导入集中式日志系统
-import sys
-sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+# 导入集中式日志系统（项目根目录由入口脚本加入模块搜索路径，不在此修改 sys.path）
 try:
-    from utils.logger import get_logger, timing_decorator
+    from utils.logger import get_logger
     logger = get_logger(__name__)
 except ImportError:
-    import logging
     logger = logging.getLogger(__name__)
 
 
+# WordprocessingML 中的段落和文本元素
+_W_NS = 'http://schemas.openxmlformats.org/wordprocessingml/2006/main'
+_W_P = f'{{{_W_NS}}}p'
+_W_T = f'{{{_W_NS}}}t'
+
+
+# 新建上传文件：文件已存在时报错；Windows下需以二进制模式打开，避免换行符被转换
+_NEW_FILE_FLAGS = os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, 'O_BINARY', 0)
+# 大文件分块写入，内核可以更早开始落盘
+_WRITE_CHUNK_SIZE = 1024 * 1024
+
+
+def _write_all(fd: int, data: bytes):
+    """
+    将数据完整写入文件描述符，处理部分写入的情况
+    
+    Args:
+        fd: 文件描述符
+        data: 要写入的数据
+    """
+    view = memoryview(data)
+    while view:
+        written = os.write(fd, view[:_WRITE_CHUNK_SIZE])
+        view = view[written:]
+
+
+def _write_new_file(file_path: str, data: bytes, fsync: bool = False):
+    """
+    不经过Python缓冲区，直接以系统调用写入一个新文件
+    
+    Args:
+        file_path: 文件路径，文件必须不存在
+        data: 文件内容
+        fsync: 是否在关闭前将内容同步到磁盘
+        
+    Raises:
+        FileExistsError: 文件已存在
+    """
+    fd = os.open(file_path, _NEW_FILE_FLAGS, 0o640)
+    try:
+        _write_all(fd, data)
+        if fsync:
+            os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+# 当前秒的时间戳字符串缓存：(整秒, ISO格式字符串)，整体替换以保证线程安全
+_ts_cache: Tuple[int, str] = (0, '')
+
+
+def _now_iso() -> str:
+    """
+    获取精确到秒的当前时间ISO字符串，同一秒内的调用复用同一个字符串
+    
+    Returns:
+        str: ISO格式时间字符串
+    """
+    global _ts_cache
+    second = int(time.time())
+    cached = _ts_cache
+    if cached[0] != second:
+        cached = (second, datetime.fromtimestamp(second).isoformat())
+        _ts_cache = cached
+    return cached[1]
+
+
 class FileHandler:
     """简化的文件处理器"""
     
-    def __init__(self, upload_dir: str = "./uploads", max_file_size: int = 10 * 1024 * 1024):
+    # get_file_info 的文件状态缓存：有效期（秒）和最大条目数
+    STAT_CACHE_TTL = 2.0
+    STAT_CACHE_SIZE = 256
+    
+    # 已确认存在的上传目录，之后创建的实例不再检查
+    _ensured_dirs = set()
+    
+    def __init__(self, upload_dir: str = "./uploads", max_file_size: int = 10 * 1024 * 1024,
+                 fsync_on_save: bool = False):
         """
         初始化文件处理器
         
         Args:
             upload_dir: 上传文件存储目录
             max_file_size: 最大文件大小（字节）
+            fsync_on_save: 保存上传文件后是否同步到磁盘（上传文件可重新上传，默认不同步）
         """
         self.upload_dir = upload_dir
         self.max_file_size = max_file_size
-        self.allowed_extensions = {'.docx', '.doc'}
+        self.fsync_on_save = fsync_on_save
+        # 小写扩展名元组，可直接用于 str.endswith
+        self.allowed_extensions = ('.docx', '.doc')
+        
+        # 模板文本缓存：路径 -> (mtime_ns, size, 文本)，模板文件修改后自动失效
+        self._template_cache: Dict[str, Tuple[int, int, str]] = {}
+        self._template_cache_lock = threading.Lock()
+        
+        # 文件状态缓存：文件ID -> (过期时间, 文件路径, 文件状态)。
+        # 只反映本处理器的保存和删除，其他进程修改上传目录后最多在有效期内返回旧信息
+        self._stat_cache: 'OrderedDict[str, Tuple[float, str, os.stat_result]]' = OrderedDict()
+        self._stat_cache_lock = threading.Lock()
         
         # 确保上传目录存在
-        if not os.path.exists(self.upload_dir):
-            os.makedirs(self.upload_dir)
+        if self.upload_dir not in FileHandler._ensured_dirs:
+            os.makedirs(self.upload_dir, exist_ok=True)
+            FileHandler._ensured_dirs.add(self.upload_dir)
         
-        logger.info(f"✅ FILE HANDLER INITIALIZED - Upload directory: {self.upload_dir}")
+        logger.info("✅ FILE HANDLER INITIALIZED - Upload directory: %s", self.upload_dir)
     
     def validate_file(self, file_path: str, filename: str) -> Dict[str, Any]:
         """
@@ -60,41 +152,18 @@ class FileHandler:
         }
         
         try:
-            # 检查文件是否存在
-            if not os.path.exists(file_path):
+            # 检查文件是否存在，同时取得文件大小
+            try:
+                file_size = os.stat(file_path).st_size
+            except FileNotFoundError:
                 validation_result['is_valid'] = False
                 validation_result['errors'].append("文件不存在")
                 return validation_result
             
-            # 检查文件大小
-            file_size = os.path.getsize(file_path)
-            validation_result['file_info']['size'] = file_size
-            
-            if file_size > self.max_file_size:
-                validation_result['is_valid'] = False
-                validation_result['errors'].append(f"文件大小超过限制 ({self.max_file_size / 1024 / 1024:.1f}MB)")
-            
-            # 检查文件扩展名
-            _, ext = os.path.splitext(filename.lower())
-            validation_result['file_info']['extension'] = ext
-            
-            if ext not in self.allowed_extensions:
-                validation_result['is_valid'] = False
-                validation_result['errors'].append(f"不支持的文件格式: {ext}")
-            
-            # 检查文件是否为空
-            if file_size == 0:
-                validation_result['is_valid'] = False
-                validation_result['errors'].append("文件为空")
-            
-            # 添加文件信息
-            validation_result['file_info'].update({
-                'filename': filename,
-                'path': file_path,
-                'upload_time': datetime.now().isoformat()
-            })
+            self._check_size_and_extension(file_size, filename, validation_result)
+            validation_result['file_info']['path'] = file_path
             
-            logger.info(f"✅ FILE VALIDATION COMPLETE: {filename} - {'PASSED' if validation_result['is_valid'] else 'FAILED'}")
+            logger.info("✅ FILE VALIDATION COMPLETE: %s - %s", filename, 'PASSED' if validation_result['is_valid'] else 'FAILED')
             return validation_result
             
         except Exception as e:
@@ -103,6 +172,77 @@ class FileHandler:
             validation_result['errors'].append(f"验证过程出错: {str(e)}")
             return validation_result
     
+    def _check_size_and_extension(self, file_size: int, filename: str, validation_result: Dict[str, Any]):
+        """
+        检查文件大小和扩展名，结果写入 validation_result
+        
+        Args:
+            file_size: 文件大小（字节）
+            filename: 文件名
+            validation_result: validate_file 格式的验证结果
+        """
+        validation_result['file_info']['size'] = file_size
+        
+        if file_size > self.max_file_size:
+            validation_result['is_valid'] = False
+            validation_result['errors'].append(f"文件大小超过限制 ({self.max_file_size / 1024 / 1024:.1f}MB)")
+        
+        # 检查文件扩展名
+        ext = self._match_extension(filename)
+        if ext is None:
+            _, ext = os.path.splitext(filename.lower())
+            validation_result['is_valid'] = False
+            validation_result['errors'].append(f"不支持的文件格式: {ext}")
+        validation_result['file_info']['extension'] = ext
+        
+        # 检查文件是否为空
+        if file_size == 0:
+            validation_result['is_valid'] = False
+            validation_result['errors'].append("文件为空")
+        
+        # 添加文件信息
+        validation_result['file_info'].update({
+            'filename': filename,
+            'upload_time': _now_iso()
+        })
+    
+    def _match_extension(self, filename: str) -> Optional[str]:
+        """
+        只比较文件名末尾，返回匹配到的小写扩展名
+        
+        Args:
+            filename: 文件名
+            
+        Returns:
+            Optional[str]: 允许的扩展名，不支持时返回 None
+        """
+        tail = filename[-6:].lower()
+        for ext in self.allowed_extensions:
+            # 文件名必须在扩展名之前还有内容，与 os.path.splitext 一致
+            if tail.endswith(ext) and len(filename) > len(ext):
+                return ext
+        return None
+    
+    def _validate_bytes(self, file_content: bytes, filename: str) -> Dict[str, Any]:
+        """
+        在写入磁盘前验证上传的文件内容，规则与 validate_file 相同
+        
+        Args:
+            file_content: 文件内容
+            filename: 文件名
+            
+        Returns:
+            Dict[str, Any]: 验证结果
+        """
+        validation_result = {
+            'is_valid': True,
+            'errors': [],
+            'warnings': [],
+            'file_info': {}
+        }
+        self._check_size_and_extension(len(file_content), filename, validation_result)
+        return validation_result
+    
     def save_uploaded_file(self, file_content: bytes, filename: str) -> Dict[str, Any]:
         """
         保存上传的文件
@@ -115,45 +255,134 @@ class FileHandler:
             Dict[str, Any]: 保存结果
         """
         try:
-            # 生成唯一文件名
-            file_id = str(uuid.uuid4())
-            _, ext = os.path.splitext(filename)
+            # 先验证内存中的内容，无效的文件不写入磁盘
+            validation = self._validate_bytes(file_content, filename)
+            logger.info("✅ FILE VALIDATION COMPLETE: %s - %s", filename, 'PASSED' if validation['is_valid'] else 'FAILED')
+            
+            if not validation['is_valid']:
+                return {
+                    'success': False,
+                    'error': 'validation_failed',
+                    'message': '文件验证失败',
+                    'validation_errors': validation['errors']
+                }
+            
+            # 生成唯一文件名（扩展名统一小写，按文件ID查找时可直接拼出路径）
+            file_id = secrets.token_hex(16)
+            ext = validation['file_info']['extension']
             unique_filename = f"{file_id}{ext}"
             file_path = os.path.join(self.upload_dir, unique_filename)
             
             # 保存文件
-            with open(file_path, 'wb') as f:
-                f.write(file_content)
+            _write_new_file(file_path, file_content, fsync=self.fsync_on_save)
             
-            # 验证保存的文件
-            validation = self.validate_file(file_path, filename)
+            result = {
+                'success': True,
+                'file_id': file_id,
+                'original_filename': filename,
+                'saved_filename': unique_filename,
+                'file_path': file_path,
+                'file_size': len(file_content),
+                'upload_time': _now_iso()
+            }
+            logger.info("文件保存成功: %s -> %s", filename, unique_filename)
+            return result
+                
+        except Exception as e:
+            logger.error(f"文件保存失败: {e}")
+            return {
+                'success': False,
+                'error': 'save_failed',
+                'message': str(e)
+            }
+    
+    def save_uploaded_stream(self, stream: BinaryIO, filename: str) -> Dict[str, Any]:
+        """
+        将上传的文件流分块写入磁盘，内存占用与文件大小无关
+        
+        Args:
+            stream: 可读的二进制文件对象（如 Flask 上传文件的 stream）
+            filename: 文件名
             
-            if validation['is_valid']:
-                result = {
-                    'success': True,
-                    'file_id': file_id,
-                    'original_filename': filename,
-                    'saved_filename': unique_filename,
-                    'file_path': file_path,
-                    'file_size': len(file_content),
-                    'upload_time': datetime.now().isoformat()
+        Returns:
+            Dict[str, Any]: 保存结果，格式与 save_uploaded_file 相同
+        """
+        created_path = None
+        try:
+            # 扩展名不支持时不写入磁盘
+            ext = self._match_extension(filename)
+            if ext is None:
+                _, bad_ext = os.path.splitext(filename.lower())
+                logger.info("✅ FILE VALIDATION COMPLETE: %s - %s", filename, 'FAILED')
+                return {
+                    'success': False,
+                    'error': 'validation_failed',
+                    'message': '文件验证失败',
+                    'validation_errors': [f"不支持的文件格式: {bad_ext}"]
                 }
-                logger.info(f"文件保存成功: {filename} -> {unique_filename}")
-                return result
-            else:
-                # 删除无效文件
-                if os.path.exists(file_path):
-                    os.remove(file_path)
-                
+            
+            file_id = secrets.token_hex(16)
+            unique_filename = f"{file_id}{ext}"
+            file_path = os.path.join(self.upload_dir, unique_filename)
+            
+            # 分块复制，超过大小限制时立即停止
+            file_size = 0
+            fd = os.open(file_path, _NEW_FILE_FLAGS, 0o640)
+            created_path = file_path
+            try:
+                while True:
+                    chunk = stream.read(_WRITE_CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    file_size += len(chunk)
+                    if file_size > self.max_file_size:
+                        break
+                    _write_all(fd, chunk)
+                if self.fsync_on_save and file_size <= self.max_file_size:
+                    os.fsync(fd)
+            finally:
+                os.close(fd)
+            
+            # 大小和空文件检查，与 save_uploaded_file 规则相同
+            validation = {
+                'is_valid': True,
+                'errors': [],
+                'warnings': [],
+                'file_info': {}
+            }
+            self._check_size_and_extension(file_size, filename, validation)
+            logger.info("✅ FILE VALIDATION COMPLETE: %s - %s", filename, 'PASSED' if validation['is_valid'] else 'FAILED')
+            
+            if not validation['is_valid']:
+                created_path = None
+                os.unlink(file_path)
                 return {
                     'success': False,
                     'error': 'validation_failed',
                     'message': '文件验证失败',
                     'validation_errors': validation['errors']
                 }
-                
+            
+            result = {
+                'success': True,
+                'file_id': file_id,
+                'original_filename': filename,
+                'saved_filename': unique_filename,
+                'file_path': file_path,
+                'file_size': file_size,
+                'upload_time': _now_iso()
+            }
+            logger.info("文件保存成功: %s -> %s", filename, unique_filename)
+            return result
+            
         except Exception as e:
             logger.error(f"文件保存失败: {e}")
+            # 清理写入到一半的文件
+            if created_path is not None:
+                try:
+                    os.unlink(created_path)
+                except OSError:
+                    pass
             return {
                 'success': False,
                 'error': 'save_failed',
@@ -172,20 +401,18 @@ class FileHandler:
         """
         try:
             # 简单的文本提取，不依赖复杂的docx模块
-            import zipfile
-            import xml.etree.ElementTree as ET
-            
             # Word文档实际上是一个zip文件
             with zipfile.ZipFile(file_path, 'r') as docx:
-                # 读取主文档内容
-                document = docx.read('word/document.xml')
-                root = ET.fromstring(document)
-                
-                # 提取所有文本
+                # 流式解析主文档内容，只提取文本元素（w:t）；
+                # 段落处理完即清空其子元素，内存占用不随文档大小增长
                 text_content = []
-                for elem in root.iter():
-                    if elem.text:
-                        text_content.append(elem.text)
+                with docx.open('word/document.xml') as document:
+                    for _, elem in ET.iterparse(document, events=('end',)):
+                        if elem.tag == _W_T:
+                            if elem.text:
+                                text_content.append(elem.text)
+                        elif elem.tag == _W_P:
+                            elem.clear()
                 
                 extracted_text = '\n'.join(text_content)
                 
@@ -196,10 +423,10 @@ class FileHandler:
                     'success': True,
                     'text_content': extracted_text,
                     'file_path': file_path,
-                    'extract_time': datetime.now().isoformat()
+                    'extract_time': _now_iso()
                 }
                 
-                logger.info(f"文本提取成功: {file_path}")
+                logger.info("文本提取成功: %s", file_path)
                 return result
                 
         except Exception as e:
@@ -210,6 +437,44 @@ class FileHandler:
                 'message': str(e)
             }
     
+    def _find_uploaded_file(self, file_id: str) -> Optional[Tuple[str, os.stat_result]]:
+        """
+        按文件ID查找已上传的文件
+        
+        上传文件保存为 {file_id}{扩展名}，扩展名只能是允许的几种，直接逐个尝试，不必列出整个目录。
+        早期版本保留原始扩展名大小写（如 .DOCX），都未命中时再扫描目录兼容这些文件。
+        
+        Args:
+            file_id: 文件ID
+            
+        Returns:
+            Optional[Tuple[str, os.stat_result]]: 文件路径及其状态，未找到时返回None
+        """
+        # 文件ID不能包含路径，避免访问上传目录之外的文件
+        if not file_id or os.path.basename(file_id) != file_id:
+            return None
+        
+        for ext in self.allowed_extensions:
+            file_path = os.path.join(self.upload_dir, f"{file_id}{ext}")
+            try:
+                return file_path, os.stat(file_path)
+            except FileNotFoundError:
+                continue
+        
+        try:
+            filenames = os.listdir(self.upload_dir)
+        except FileNotFoundError:
+            return None
+        for filename in filenames:
+            base, ext = os.path.splitext(filename)
+            if base == file_id and ext.lower() in self.allowed_extensions:
+                file_path = os.path.join(self.upload_dir, filename)
+                try:
+                    return file_path, os.stat(file_path)
+                except FileNotFoundError:
+                    continue
+        return None
+    
     def get_file_info(self, file_id: str) -> Optional[Dict[str, Any]]:
         """
         获取文件信息
@@ -221,22 +486,36 @@ class FileHandler:
             Optional[Dict[str, Any]]: 文件信息
         """
         try:
-            # 查找文件
-            for filename in os.listdir(self.upload_dir):
-                if filename.startswith(file_id):
-                    file_path = os.path.join(self.upload_dir, filename)
-                    if os.path.exists(file_path):
-                        stat = os.stat(file_path)
-                        return {
-                            'file_id': file_id,
-                            'filename': filename,
-                            'file_path': file_path,
-                            'file_size': stat.st_size,
-                            'created_time': datetime.fromtimestamp(stat.st_ctime).isoformat(),
-                            'modified_time': datetime.fromtimestamp(stat.st_mtime).isoformat()
-                        }
+            # 查找文件，短时间内重复查询同一文件时使用缓存的文件状态
+            now = time.monotonic()
+            with self._stat_cache_lock:
+                cached = self._stat_cache.get(file_id)
+                if cached is not None and cached[0] <= now:
+                    del self._stat_cache[file_id]
+                    cached = None
             
-            return None
+            if cached is not None:
+                _, file_path, stat = cached
+            else:
+                found = self._find_uploaded_file(file_id)
+                if found is None:
+                    return None
+                
+                file_path, stat = found
+                with self._stat_cache_lock:
+                    self._stat_cache[file_id] = (now + self.STAT_CACHE_TTL, file_path, stat)
+                    self._stat_cache.move_to_end(file_id)
+                    if len(self._stat_cache) > self.STAT_CACHE_SIZE:
+                        self._stat_cache.popitem(last=False)
+            
+            return {
+                'file_id': file_id,
+                'filename': os.path.basename(file_path),
+                'file_path': file_path,
+                'file_size': stat.st_size,
+                'created_time': datetime.fromtimestamp(stat.st_ctime).isoformat(),
+                'modified_time': datetime.fromtimestamp(stat.st_mtime).isoformat()
+            }
             
         except Exception as e:
             logger.error(f"获取文件信息失败: {e}")
@@ -254,15 +533,16 @@ class FileHandler:
         """
         try:
             # 查找并删除文件
-            for filename in os.listdir(self.upload_dir):
-                if filename.startswith(file_id):
-                    file_path = os.path.join(self.upload_dir, filename)
-                    if os.path.exists(file_path):
-                        os.remove(file_path)
-                        logger.info(f"文件删除成功: {filename}")
-                        return True
-            
-            logger.warning(f"文件未找到: {file_id}")
+            with self._stat_cache_lock:
+                self._stat_cache.pop(file_id, None)
+            found = self._find_uploaded_file(file_id)
+            if found is not None:
+                file_path = found[0]
+                os.remove(file_path)
+                logger.info("文件删除成功: %s", os.path.basename(file_path))
+                return True
+            
+            logger.warning("文件未找到: %s", file_id)
             return False
             
         except Exception as e:
@@ -287,22 +567,37 @@ class FileHandler:
                 template_path = os.path.join(current_dir, "2023【教学设计模板】思维发展型课堂-XX学校-XX教师.docx")
             
             # 检查模板文件是否存在
-            if not os.path.exists(template_path):
+            try:
+                st = os.stat(template_path)
+            except FileNotFoundError:
                 return {
                     'success': False,
                     'error': 'template_not_found',
                     'message': f'模板文件不存在: {template_path}'
                 }
             
+            # 模板文件未修改时直接使用缓存的文本
+            with self._template_cache_lock:
+                cached = self._template_cache.get(template_path)
+            if cached is not None and cached[:2] == (st.st_mtime_ns, st.st_size):
+                return {
+                    'success': True,
+                    'template_path': template_path,
+                    'template_content': cached[2],
+                    'extract_time': _now_iso()
+                }
+            
             # 提取模板文件文本内容
             text_result = self.extract_text_from_docx(template_path)
             
             if text_result['success']:
+                with self._template_cache_lock:
+                    self._template_cache[template_path] = (st.st_mtime_ns, st.st_size, text_result['text_content'])
                 return {
                     'success': True,
                     'template_path': template_path,
                     'template_content': text_result['text_content'],
-                    'extract_time': datetime.now().isoformat()
+                    'extract_time': _now_iso()
                 }
             else:
                 return {
@@ -320,6 +615,23 @@ class FileHandler:
             }
 
 
+@functools.lru_cache(maxsize=None)
+def get_file_handler(upload_dir: str = "./uploads", max_file_size: int = 10 * 1024 * 1024) -> FileHandler:
+    """
+    获取共享的文件处理器实例
+    
+    相同参数始终返回同一实例，使模板缓存和文件状态缓存在各请求之间累积命中。
+    
+    Args:
+        upload_dir: 上传文件存储目录
+        max_file_size: 最大文件大小（字节）
+        
+    Returns:
+        FileHandler: 共享的文件处理器
+    """
+    return FileHandler(upload_dir, max_file_size)
+
+
 # 使用示例
 if __name__ == "__main__":
     # 配置日志
@@ -5,34 +5,27 @@
 用于指导LLM生成符合JSON格式的教学设计数据
 """
 
-def get_teaching_design_prompt(user_file_content: str, template_file_content: str) -> str:
-    """
-    获取教学设计生成提示词
-    
-    Args:
-        user_file_content: 用户上传文件的文本内容
-        template_file_content: 模板文件的文本内容
-        
-    Returns:
-        str: 完整的提示词
-    """
-    
-    prompt = f"""你是一位精通教学法和课程设计的专家。请基于"思维发展型课堂"模型，根据用户提供的学习材料，创建一份全面、高质量的教学设计。
+# 提示词的静态部分在导入时构建一次，调用时只需拼接用户内容和模板内容
+_PREAMBLE = """你是一位精通教学法和课程设计的专家。请基于"思维发展型课堂"模型，根据用户提供的学习材料，创建一份全面、高质量的教学设计。
 
 **重要：请严格按照以下JSON格式输出结果，不要包含任何其他文字或解释。**
 
 **输入材料：**
 1. 用户上传的学习材料内容：
-{user_file_content}
+"""
+
+_MIDDLE = """
 
 2. 教学设计模板内容：
-{template_file_content}
+"""
+
+_TAIL = """
 
 **输出要求：**
 请分析学习材料，并严格按照以下JSON格式输出教学设计数据：
 
 ```json
-{{
+{
     "lesson_name": "课例名称（使用学习材料的标题或核心主题）",
     "grade_level": "学段年级（如：小学一年级、初中二年级、高中一年级）",
     "subject": "学科（如：语文、数学、英语、物理、化学、生物、历史、地理、政治）",
@@ -46,37 +39,37 @@ def get_teaching_design_prompt(user_file_content: str, template_file_content: st
     "learning_objectives": "学习目标及重难点（3-4个具体可测量的目标，使用行为动词，标注重点和难点，必须采用序号形式呈现）",
     "lesson_structure": "课例结构（整体教学流程，如：导入→新知探究→巩固练习→总结与拓展）",
     "learning_activities": [
-        {{
+        {
             "name": "活动环节名称",
             "teacher_activity": "教师活动描述",
             "student_activity": "学生活动描述",
             "activity_intent": "该活动的教学意图和目的"
-        }},
-        {{
+        },
+        {
             "name": "活动环节名称",
             "teacher_activity": "教师活动描述",
             "student_activity": "学生活动描述",
             "activity_intent": "该活动的教学意图和目的"
-        }}
+        }
     ],
     "blackboard_design": "板书设计（用文本描述板书布局，包括关键术语、图示和总结）",
     "homework_extension": "作业与拓展学习设计（1-2个家庭作业或拓展活动）",
     "materials_design": "素材设计（学习单、练习纸等，如无则写'本课未设计额外学习素材'）",
     "reflection_thinking_points": [
-        {{
+        {
             "point_type": "认知冲突",
             "description": "找出1-2个学生可能遇到挑战性或反直觉观点的地方（100字以内）"
-        }},
-        {{
+        },
+        {
             "point_type": "思维图示",
             "description": "找出1-2个使用思维工具（思维导图、流程图、对比图）的实例（100字以内）"
-        }},
-        {{
+        },
+        {
             "point_type": "变式运用",
             "description": "找出1-2个通过变化练习或案例深化学生理解的例子（100字以内）"
-        }}
+        }
     ]
-}}
+}
 ```
 
 **内容分析指导：**
@@ -162,7 +155,18 @@ def get_teaching_design_prompt(user_file_content: str, template_file_content: st
 
 现在请开始分析学习材料并生成教学设计JSON数据："""
 
-    return prompt
+def get_teaching_design_prompt(user_file_content: str, template_file_content: str) -> str:
+    """
+    获取教学设计生成提示词
+    
+    Args:
+        user_file_content: 用户上传文件的文本内容
+        template_file_content: 模板文件的文本内容
+        
+    Returns:
+        str: 完整的提示词
+    """
+    return ''.join((_PREAMBLE, user_file_content, _MIDDLE, template_file_content, _TAIL))
 
 def get_json_schema_prompt() -> str:
     """
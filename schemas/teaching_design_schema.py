@@ -6,26 +6,62 @@
 """
 
 from typing import Dict, List, Any, Optional
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass, fields
 import json
+import re
 
+# orjson 为可选依赖，未安装时回退到标准库json
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# 各数据类声明 __slots__，实例不再携带 __dict__（兼容 Python 3.8，不使用 dataclass(slots=True)）
 @dataclass
 class ActivityInfo:
     """学习活动信息"""
+    __slots__ = ('name', 'teacher_activity', 'student_activity', 'activity_intent')
+    
     name: str  # 活动名称
     teacher_activity: str  # 教师活动
     student_activity: str  # 学生活动
     activity_intent: str  # 活动意图
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为字典格式"""
+        return {
+            'name': self.name,
+            'teacher_activity': self.teacher_activity,
+            'student_activity': self.student_activity,
+            'activity_intent': self.activity_intent
+        }
 
 @dataclass
 class ThinkingPoint:
     """思维训练点"""
+    __slots__ = ('point_type', 'description')
+    
     point_type: str  # 类型：认知冲突、思维图示、变式运用
     description: str  # 说明
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为字典格式"""
+        return {
+            'point_type': self.point_type,
+            'description': self.description
+        }
 
 @dataclass
 class TeachingDesignData:
     """教学设计数据结构"""
+    __slots__ = (
+        'lesson_name', 'grade_level', 'subject', 'textbook_version',
+        'lesson_period', 'teacher_school', 'teacher_name', 'summary',
+        'content_analysis', 'learner_analysis', 'learning_objectives',
+        'lesson_structure', 'learning_activities', 'blackboard_design',
+        'homework_extension', 'materials_design', 'reflection_thinking_points'
+    )
+    
     # 基本信息
     lesson_name: str
     grade_level: str
@@ -48,48 +84,103 @@ class TeachingDesignData:
     reflection_thinking_points: List[ThinkingPoint]
     
     def to_dict(self) -> Dict[str, Any]:
-        """转换为字典格式"""
-        return asdict(self)
+        """转换为字典格式（字段均为字符串，无需 asdict 的递归深拷贝）"""
+        return {
+            'lesson_name': self.lesson_name,
+            'grade_level': self.grade_level,
+            'subject': self.subject,
+            'textbook_version': self.textbook_version,
+            'lesson_period': self.lesson_period,
+            'teacher_school': self.teacher_school,
+            'teacher_name': self.teacher_name,
+            'summary': self.summary,
+            'content_analysis': self.content_analysis,
+            'learner_analysis': self.learner_analysis,
+            'learning_objectives': self.learning_objectives,
+            'lesson_structure': self.lesson_structure,
+            'learning_activities': [activity.to_dict() for activity in self.learning_activities],
+            'blackboard_design': self.blackboard_design,
+            'homework_extension': self.homework_extension,
+            'materials_design': self.materials_design,
+            'reflection_thinking_points': [point.to_dict() for point in self.reflection_thinking_points]
+        }
     
-    def to_json(self) -> str:
-        """转换为JSON字符串"""
-        return json.dumps(self.to_dict(), ensure_ascii=False, indent=2)
+    def to_json(self, pretty: bool = False) -> str:
+        """
+        转换为JSON字符串
+        
+        Args:
+            pretty: 是否缩进排版（标准库json缩进输出无法使用C加速，仅在需要阅读时使用）
+            
+        Returns:
+            str: JSON字符串
+        """
+        data = self.to_dict()
+        if orjson is not None:
+            return orjson.dumps(data, option=orjson.OPT_INDENT_2 if pretty else 0).decode('utf-8')
+        if pretty:
+            return json.dumps(data, ensure_ascii=False, indent=2)
+        return json.dumps(data, ensure_ascii=False, separators=(',', ':'))
     
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> 'TeachingDesignData':
-        """从字典创建对象"""
+        """
+        从字典创建对象
+        
+        数据已由 validate_teaching_design_data 校验，嵌套对象只读取声明的字段，
+        模型额外返回的字段被忽略
+        """
         # 处理学习活动列表
         activities = []
         if 'learning_activities' in data:
             for activity_data in data['learning_activities']:
-                activities.append(ActivityInfo(**activity_data))
+                activities.append(ActivityInfo(
+                    activity_data['name'],
+                    activity_data['teacher_activity'],
+                    activity_data['student_activity'],
+                    activity_data['activity_intent']
+                ))
         
         # 处理思维训练点列表
         thinking_points = []
         if 'reflection_thinking_points' in data:
             for point_data in data['reflection_thinking_points']:
-                thinking_points.append(ThinkingPoint(**point_data))
+                thinking_points.append(ThinkingPoint(
+                    point_data['point_type'],
+                    point_data['description']
+                ))
         
-        # 创建对象
-        return cls(
-            lesson_name=data.get('lesson_name', ''),
-            grade_level=data.get('grade_level', ''),
-            subject=data.get('subject', ''),
-            textbook_version=data.get('textbook_version', ''),
-            lesson_period=data.get('lesson_period', ''),
-            teacher_school=data.get('teacher_school', ''),
-            teacher_name=data.get('teacher_name', ''),
-            summary=data.get('summary', ''),
-            content_analysis=data.get('content_analysis', ''),
-            learner_analysis=data.get('learner_analysis', ''),
-            learning_objectives=data.get('learning_objectives', ''),
-            lesson_structure=data.get('lesson_structure', ''),
-            learning_activities=activities,
-            blackboard_design=data.get('blackboard_design', ''),
-            homework_extension=data.get('homework_extension', ''),
-            materials_design=data.get('materials_design', ''),
-            reflection_thinking_points=thinking_points
-        )
+        # 创建对象（按字段声明顺序以位置参数调用 __init__，见 _build_design_factory）
+        return _new_teaching_design(cls, data.get, activities, thinking_points)
+
+def _build_design_factory():
+    """
+    生成按字段声明顺序、以位置参数调用 TeachingDesignData.__init__ 的工厂函数
+    
+    与 dataclasses 生成 __init__ 的方式相同，拼接函数源码后 exec 编译。
+    17个字段用位置参数传递比关键字参数快，字段顺序取自类定义，无需手工维护。
+    
+    Returns:
+        工厂函数 (cls, get, activities, thinking_points) -> TeachingDesignData
+    """
+    args = []
+    for field in fields(TeachingDesignData):
+        if field.name == 'learning_activities':
+            args.append('activities')
+        elif field.name == 'reflection_thinking_points':
+            args.append('thinking_points')
+        else:
+            args.append(f"get({field.name!r}, '')")
+    
+    source = (
+        "def _new_teaching_design(cls, get, activities, thinking_points):\n"
+        f"    return cls({', '.join(args)})\n"
+    )
+    namespace = {}
+    exec(source, namespace)
+    return namespace['_new_teaching_design']
+
+_new_teaching_design = _build_design_factory()
 
 # JSON Schema定义（用于验证LLM输出）
 TEACHING_DESIGN_JSON_SCHEMA = {
@@ -145,6 +236,23 @@ TEACHING_DESIGN_JSON_SCHEMA = {
     ]
 }
 
+# 预先整理的必需字段：元组保持报错顺序，frozenset 用于整体子集判断
+_REQUIRED_FIELDS = tuple(TEACHING_DESIGN_JSON_SCHEMA["required"])
+_REQUIRED_FIELD_SET = frozenset(_REQUIRED_FIELDS)
+_ACTIVITY_FIELDS = tuple(TEACHING_DESIGN_JSON_SCHEMA["properties"]["learning_activities"]["items"]["required"])
+_ACTIVITY_FIELD_SET = frozenset(_ACTIVITY_FIELDS)
+_POINT_FIELDS = tuple(TEACHING_DESIGN_JSON_SCHEMA["properties"]["reflection_thinking_points"]["items"]["required"])
+_POINT_FIELD_SET = frozenset(_POINT_FIELDS)
+
+# 原始文档短于该长度时关键词统计没有参考价值，跳过内容覆盖检查
+_MIN_COVERAGE_CONTENT_LENGTH = 200
+
+# 课例结构的环节分隔符
+_STRUCTURE_SEPARATORS = ("→", "->", "-")
+
+# 常见教学环节关键词；关键词等长，最左匹配即最先结束的匹配，与逐字符扫描结果一致
+_STRUCTURE_KEYWORDS_RE = re.compile("导入|新知|探究|巩固|练习|总结|拓展|延伸")
+
 # 示例数据
 EXAMPLE_TEACHING_DESIGN = {
     "lesson_name": "《春》教学设计",
@@ -223,11 +331,11 @@ def validate_teaching_design_data(data: Dict[str, Any], original_content: str =
     """
     errors = []
     
-    # 检查必需字段
-    required_fields = TEACHING_DESIGN_JSON_SCHEMA["required"]
-    for field in required_fields:
-        if field not in data:
-            errors.append(f"缺少必需字段: {field}")
+    # 检查必需字段（字段齐全时一次子集判断即可，缺字段时再逐个报告）
+    if not _REQUIRED_FIELD_SET <= data.keys():
+        for field in _REQUIRED_FIELDS:
+            if field not in data:
+                errors.append(f"缺少必需字段: {field}")
     
     # 检查学习活动列表
     if "learning_activities" in data:
@@ -237,9 +345,8 @@ def validate_teaching_design_data(data: Dict[str, Any], original_content: str =
             for i, activity in enumerate(data["learning_activities"]):
                 if not isinstance(activity, dict):
                     errors.append(f"学习活动 {i+1} 必须是字典")
-                else:
-                    required_activity_fields = ["name", "teacher_activity", "student_activity", "activity_intent"]
-                    for field in required_activity_fields:
+                elif not _ACTIVITY_FIELD_SET <= activity.keys():
+                    for field in _ACTIVITY_FIELDS:
                         if field not in activity:
                             errors.append(f"学习活动 {i+1} 缺少字段: {field}")
     
@@ -251,9 +358,8 @@ def validate_teaching_design_data(data: Dict[str, Any], original_content: str =
             for i, point in enumerate(data["reflection_thinking_points"]):
                 if not isinstance(point, dict):
                     errors.append(f"思维训练点 {i+1} 必须是字典")
-                else:
-                    required_point_fields = ["point_type", "description"]
-                    for field in required_point_fields:
+                elif not _POINT_FIELD_SET <= point.keys():
+                    for field in _POINT_FIELDS:
                         if field not in point:
                             errors.append(f"思维训练点 {i+1} 缺少字段: {field}")
     
@@ -264,28 +370,22 @@ def validate_teaching_design_data(data: Dict[str, Any], original_content: str =
         
         if isinstance(lesson_structure, str) and isinstance(learning_activities, list):
             # 解析lesson_structure中的环节
-            # 常见的分隔符：→、->、-、→、→
+            # 常见的分隔符：→、->、-，按顺序使用第一个出现的分隔符
             structure_parts = []
-            for separator in ["→", "->", "-", "→", "→"]:
+            for separator in _STRUCTURE_SEPARATORS:
                 if separator in lesson_structure:
                     structure_parts = [part.strip() for part in lesson_structure.split(separator)]
                     break
             
             # 如果没有找到分隔符，尝试其他方式解析
             if not structure_parts:
-                # 尝试按常见教学环节关键词分割
-                keywords = ["导入", "新知", "探究", "巩固", "练习", "总结", "拓展", "延伸"]
-                structure_parts = []
-                current_part = ""
-                for char in lesson_structure:
-                    current_part += char
-                    for keyword in keywords:
-                        if keyword in current_part and current_part.strip():
-                            structure_parts.append(current_part.strip())
-                            current_part = ""
-                            break
-                if current_part.strip():
-                    structure_parts.append(current_part.strip())
+                # 按常见教学环节关键词分割：每个环节截止到其中第一个关键词的末尾
+                start = 0
+                for match in _STRUCTURE_KEYWORDS_RE.finditer(lesson_structure):
+                    structure_parts.append(lesson_structure[start:match.end()].strip())
+                    start = match.end()
+                if lesson_structure[start:].strip():
+                    structure_parts.append(lesson_structure[start:].strip())
             
             # 检查learning_activities数量是否与structure_parts匹配
             if len(structure_parts) > 0:
@@ -299,20 +399,23 @@ def validate_teaching_design_data(data: Dict[str, Any], original_content: str =
                 elif len(learning_activities) > len(structure_parts) + 2:  # 允许有2个额外的活动作为容错
                     errors.append(f"学习活动数量({len(learning_activities)})明显多于课例结构环节数量({len(structure_parts)})，请检查是否有多余的活动")
     
-    # 内容覆盖检查（如果有原始文档内容）
-    if original_content and "learning_activities" in data:
-        content_coverage_errors = _check_content_coverage(data, original_content)
+    # 内容覆盖检查（如果有足够长的原始文档内容），文档只转换一次小写，供各项检查共用
+    if original_content and len(original_content) >= _MIN_COVERAGE_CONTENT_LENGTH and "learning_activities" in data:
+        original_lower = original_content.lower()
+        content_coverage_errors = _check_content_coverage(data, original_content, original_lower)
         errors.extend(content_coverage_errors)
     
     return len(errors) == 0, errors
 
-def _check_content_coverage(data: Dict[str, Any], original_content: str) -> List[str]:
+def _check_content_coverage(data: Dict[str, Any], original_content: str,
+                           original_lower: Optional[str] = None) -> List[str]:
     """
     检查教学设计是否完整覆盖了原始文档内容
     
     Args:
         data: 教学设计数据
         original_content: 原始文档内容
+        original_lower: 小写的原始文档内容，为None时自行转换
         
     Returns:
         List[str]: 内容覆盖相关的错误信息
@@ -335,7 +438,8 @@ def _check_content_coverage(data: Dict[str, Any], original_content: str) -> List
             activity_content_keywords.append(activity_text.lower())
     
     # 分析原始文档内容，提取重要概念和知识点
-    original_lower = original_content.lower()
+    if original_lower is None:
+        original_lower = original_content.lower()
     
     # 检查是否有明显的内容遗漏
     # 这里可以添加更复杂的自然语言处理逻辑
@@ -364,34 +468,45 @@ def _check_content_coverage(data: Dict[str, Any], original_content: str) -> List
     if len(learning_activities) < 3:
         errors.append("学习活动数量可能不足以覆盖文档中的所有重要内容，建议增加教学环节")
     
-    # 检查是否有重复的活动意图
-    activity_intents = [activity.get("activity_intent", "") for activity in learning_activities if isinstance(activity, dict)]
-    if len(activity_intents) != len(set(activity_intents)):
-        errors.append("发现重复的活动意图，请确保每个学习活动都有独特的目的")
+    # 检查是否有重复的活动意图，发现第一个重复即停止
+    seen_intents = set()
+    for activity in learning_activities:
+        if isinstance(activity, dict):
+            intent = activity.get("activity_intent", "")
+            if intent in seen_intents:
+                errors.append("发现重复的活动意图，请确保每个学习活动都有独特的目的")
+                break
+            seen_intents.add(intent)
     
     # 检查内容相符性
-    content_alignment_errors = _check_content_alignment(data, original_content)
+    content_alignment_errors = _check_content_alignment(data, original_content, original_lower)
     errors.extend(content_alignment_errors)
     
     return errors
 
-def _check_content_alignment(data: Dict[str, Any], original_content: str) -> List[str]:
+def _check_content_alignment(data: Dict[str, Any], original_content: str,
+                             original_lower: Optional[str] = None) -> List[str]:
     """
     检查教学设计是否与文档内容相符
     
     Args:
         data: 教学设计数据
         original_content: 原始文档内容
+        original_lower: 小写的原始文档内容，为None时自行转换
         
     Returns:
         List[str]: 内容相符性相关的错误信息
     """
     errors = []
     
-    original_lower = original_content.lower()
+    if original_lower is None:
+        original_lower = original_content.lower()
+    
+    # 文档只按句号切分一次，教学要求和知识点提取共用
+    sentences = original_content.split('。')
     
     # 检查是否包含了文档中提到的教学方法
-    teaching_methods_in_doc = _extract_teaching_methods(original_content)
+    teaching_methods_in_doc = _extract_teaching_methods(original_content, original_lower)
     if teaching_methods_in_doc:
         learning_activities = data.get("learning_activities", [])
         activity_texts = []
@@ -416,7 +531,7 @@ def _check_content_alignment(data: Dict[str, Any], original_content: str) -> Lis
             errors.append(f"文档中提到了多种教学方法，但教学设计中体现不足，建议增加小组讨论、合作探究等活动")
     
     # 检查是否包含了文档中的教学要求（放宽检查条件）
-    teaching_requirements = _extract_teaching_requirements(original_content)
+    teaching_requirements = _extract_teaching_requirements(original_content, sentences)
     if teaching_requirements:
         learning_objectives = data.get("learning_objectives", "").lower()
         lesson_structure = data.get("lesson_structure", "").lower()
@@ -432,7 +547,7 @@ def _check_content_alignment(data: Dict[str, Any], original_content: str) -> Lis
             errors.append("教学设计中缺少文档要求的核心教学要素，请确保包含掌握、理解、运用等关键要求")
     
     # 检查知识点分离情况
-    knowledge_points = _extract_knowledge_points(original_content)
+    knowledge_points = _extract_knowledge_points(original_content, sentences)
     if len(knowledge_points) > 1:
         learning_activities = data.get("learning_activities", [])
         if len(learning_activities) < len(knowledge_points):
@@ -440,12 +555,30 @@ def _check_content_alignment(data: Dict[str, Any], original_content: str) -> Lis
     
     return errors
 
-def _extract_teaching_methods(content: str) -> List[str]:
+# 常见的教学要求关键词
+_REQUIREMENT_KEYWORDS = (
+    "掌握", "理解", "运用", "分析", "评价", "创造", "应用", "学会",
+    "能够", "可以", "必须", "需要", "要求", "目标", "重点", "难点"
+)
+
+# 常见的知识点指示词
+_KNOWLEDGE_INDICATORS = (
+    "概念", "定义", "原理", "定理", "公式", "方法", "技巧", "技能",
+    "性质", "特征", "特点", "规律", "法则", "规则", "步骤", "过程",
+    "类型", "分类", "结构", "组成", "关系", "联系", "区别", "对比"
+)
+
+# 逐句匹配时一次正则搜索代替逐个关键词的子串查找
+_REQUIREMENT_KEYWORDS_RE = re.compile('|'.join(map(re.escape, _REQUIREMENT_KEYWORDS)))
+_KNOWLEDGE_INDICATORS_RE = re.compile('|'.join(map(re.escape, _KNOWLEDGE_INDICATORS)))
+
+def _extract_teaching_methods(content: str, content_lower: Optional[str] = None) -> List[str]:
     """
     从文档中提取教学方法
     
     Args:
         content: 文档内容
+        content_lower: 小写的文档内容，为None时自行转换
         
     Returns:
         List[str]: 教学方法列表
@@ -459,71 +592,63 @@ def _extract_teaching_methods(content: str) -> List[str]:
         "自主学习", "合作探究", "实践操作", "演示", "讲解", "练习"
     ]
     
-    content_lower = content.lower()
+    if content_lower is None:
+        content_lower = content.lower()
     for keyword in method_keywords:
         if keyword in content_lower:
             methods.append(keyword)
     
     return methods
 
-def _extract_teaching_requirements(content: str) -> List[str]:
+def _extract_teaching_requirements(content: str, sentences: Optional[List[str]] = None) -> List[str]:
     """
     从文档中提取教学要求
     
     Args:
         content: 文档内容
+        sentences: 按句号切分好的文档内容，为None时自行切分
         
     Returns:
         List[str]: 教学要求列表
     """
     requirements = []
+    if sentences is None:
+        sentences = content.split('。')
     
-    # 常见的教学要求关键词
-    requirement_keywords = [
-        "掌握", "理解", "运用", "分析", "评价", "创造", "应用", "学会",
-        "能够", "可以", "必须", "需要", "要求", "目标", "重点", "难点"
-    ]
-    
-    content_lower = content.lower()
-    sentences = content.split('。')
-    
+    # 每个句子只需一次正则搜索；关键词均为中文，不受大小写转换影响
     for sentence in sentences:
-        sentence_lower = sentence.lower()
-        for keyword in requirement_keywords:
-            if keyword in sentence_lower and len(sentence.strip()) > 5:
-                requirements.append(sentence.strip())
+        sentence = sentence.strip()
+        if len(sentence) > 5 and _REQUIREMENT_KEYWORDS_RE.search(sentence):
+            requirements.append(sentence)
+            if len(requirements) == 5:  # 限制返回前5个要求
                 break
     
-    return requirements[:5]  # 限制返回前5个要求
+    return requirements
 
-def _extract_knowledge_points(content: str) -> List[str]:
+def _extract_knowledge_points(content: str, sentences: Optional[List[str]] = None) -> List[str]:
     """
     从文档中提取知识点
     
     Args:
         content: 文档内容
+        sentences: 按句号切分好的文档内容，为None时自行切分
         
     Returns:
         List[str]: 知识点列表
     """
     knowledge_points = []
+    seen = set()
+    if sentences is None:
+        sentences = content.split('。')
     
-    # 常见的知识点指示词
-    knowledge_indicators = [
-        "概念", "定义", "原理", "定理", "公式", "方法", "技巧", "技能",
-        "性质", "特征", "特点", "规律", "法则", "规则", "步骤", "过程",
-        "类型", "分类", "结构", "组成", "关系", "联系", "区别", "对比"
-    ]
-    
-    sentences = content.split('。')
+    # 扫描时即去重，重复的句子不再做正则搜索，结果保持文档中的顺序
     for sentence in sentences:
-        sentence_lower = sentence.lower()
-        for indicator in knowledge_indicators:
-            if indicator in sentence_lower and len(sentence.strip()) > 5:
-                knowledge_points.append(sentence.strip())
-                break
+        sentence = sentence.strip()
+        if len(sentence) > 5 and sentence not in seen and _KNOWLEDGE_INDICATORS_RE.search(sentence):
+            seen.add(sentence)
+            knowledge_points.append(sentence)
     
-    return list(set(knowledge_points))  # 去重
+    return knowledge_points
 
 # 使用示例
 if __name__ == "__main__":
@@ -536,7 +661,7 @@ if __name__ == "__main__":
     if is_valid:
         print("数据验证通过")
         print("JSON格式:")
-        print(design_data.to_json())
+        print(design_data.to_json(pretty=True))
     else:
         print("数据验证失败:")
         for error in errors:
@@ -1,30 +1,76 @@
 ﻿import os
 import sys
 import socket
+import signal
+import threading
 import webbrowser
 import time
-from dotenv import load_dotenv
+import functools
+from dotenv import dotenv_values
+
+@functools.lru_cache(maxsize=None)
+def _load_config():
+    """
+    解析一次.env文件并与环境变量合并，环境变量优先（与 load_dotenv 默认行为一致）
+    
+    .env中的值同时写入 os.environ，供应用内其他模块读取
+    """
+    values = dotenv_values()
+    for key, value in values.items():
+        if value is not None:
+            os.environ.setdefault(key, value)
+    return {**values, **os.environ}
+
+def cfg(key, default=None):
+    """读取配置项"""
+    value = _load_config().get(key)
+    return default if value is None else value
 
 def find_free_port(start_port=None, max_port=None):
-    """查找可用端口"""
+    """查找可用端口：依次尝试 start_port 开始的端口，start_port 为0或范围内没有可用端口时由系统分配"""
     if start_port is None:
-        start_port = int(os.getenv('PORT_RANGE_START', 5000))
+        start_port = int(cfg('PORT_RANGE_START', 5000))
     if max_port is None:
-        max_port = int(os.getenv('PORT_RANGE_END', 5100))
+        max_port = int(cfg('PORT_RANGE_END', 5100))
     
-    for port in range(start_port, max_port):
+    for port in range(start_port, max_port) if start_port else ():
         try:
             with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+                # 与Flask服务器一样允许复用TIME_WAIT状态的端口，避免上次运行刚释放的端口被跳过；
+                # Windows下SO_REUSEADDR允许绑定正在使用的端口，因此不设置
+                if os.name != 'nt':
+                    s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
                 s.bind(('localhost', port))
                 return port
         except OSError:
             continue
-    return None
+    
+    # 由系统分配空闲端口，只需一次bind
+    try:
+        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+            s.bind(('localhost', 0))
+            return s.getsockname()[1]
+    except OSError:
+        return None
+
+def wait_for_port(port, timeout=10.0):
+    """等待本机端口可以连接，间隔按指数增长；超时返回False"""
+    deadline = time.monotonic() + timeout
+    interval = 0.05
+    while True:
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=0.5):
+                return True
+        except OSError:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            time.sleep(min(interval, remaining))
+            interval = min(interval * 1.5, 1.0)
 
 def open_browser(url, delay=2):
     """延迟打开浏览器"""
     def _open():
-        time.sleep(delay)
         try:
             webbrowser.open(url)
             print(f"浏览器已打开: {url}")
@@ -32,39 +78,40 @@ def open_browser(url, delay=2):
             print(f"无法自动打开浏览器: {e}")
             print(f"请手动访问: {url}")
     
-    import threading
-    browser_thread = threading.Thread(target=_open, daemon=True)
-    browser_thread.start()
+    timer = threading.Timer(delay, _open)
+    timer.daemon = True
+    timer.start()
 
 def main():
     print("=" * 50)
     print("AI文档助手 v0.1.0")
     print("=" * 50)
     
-    load_dotenv()
+    _load_config()
     
-    api_key = os.getenv('DASHSCOPE_API_KEY')
+    api_key = cfg('DASHSCOPE_API_KEY')
     if not api_key or api_key == 'your_dashscope_api_key_here':
         print("警告: 未配置API密钥")
         print("请在.env文件中设置DASHSCOPE_API_KEY")
         print()
     
-    os.makedirs('uploads', exist_ok=True)
-    os.makedirs('outputs', exist_ok=True)
-    os.makedirs('logs', exist_ok=True)
+    # 目录已存在时只需一次stat，不再尝试mkdir
+    for directory in ('uploads', 'outputs', 'logs'):
+        if not os.path.isdir(directory):
+            os.makedirs(directory, exist_ok=True)
     
     try:
         from app import app
         
-        # 查找可用端口
-        default_port = int(os.getenv('PORT', 5000))
+        # 查找可用端口（未配置PORT时直接使用系统分配的端口）
+        default_port = int(cfg('PORT', 0))
         port = find_free_port(default_port)
         
         if port is None:
             print("错误: 无法找到可用端口")
             sys.exit(1)
         
-        debug = os.getenv('FLASK_DEBUG', 'False').lower() == 'true'
+        debug = cfg('FLASK_DEBUG', 'False').lower() == 'true'
         
         print("启动应用...")
         print(f"使用端口: {port}")
@@ -76,33 +123,37 @@ def main():
         browser_url = f"http://localhost:{port}"
         
         # 启动应用（在后台线程中）
-        import threading
         app_thread = threading.Thread(
             target=lambda: app.run(host='0.0.0.0', port=port, debug=debug, threaded=True, use_reloader=False),
             daemon=True
         )
         app_thread.start()
         
-        # 等待应用启动
+        # 等待应用启动（端口可以连接即表示服务已就绪）
         print("等待应用启动...")
-        time.sleep(3)
+        ready = wait_for_port(port)
+        if not ready:
+            print("应用未在10秒内就绪，打开页面后可能需要刷新")
         
         # 自动打开浏览器（根据配置）
-        auto_open = os.getenv('AUTO_OPEN_BROWSER', 'true').lower() == 'true'
+        auto_open = cfg('AUTO_OPEN_BROWSER', 'true').lower() == 'true'
         if auto_open:
             print("正在打开浏览器...")
-            open_browser(browser_url)
+            # 服务已就绪时无需再延迟
+            open_browser(browser_url, delay=0 if ready else 2)
         else:
             print("自动打开浏览器已禁用")
             print(f"请手动访问: {browser_url}")
         
-        # 保持主线程运行
-        try:
-            while True:
-                time.sleep(1)
-        except KeyboardInterrupt:
-            print("\n正在停止应用...")
-            sys.exit(0)
+        # 保持主线程阻塞，直到收到 Ctrl+C（SIGINT）
+        stop = threading.Event()
+        signal.signal(signal.SIGINT, lambda signum, frame: stop.set())
+        # Windows下无超时的等待不能被 Ctrl+C 打断，仍按秒检查
+        wait_timeout = 1.0 if os.name == 'nt' else None
+        while not stop.wait(wait_timeout):
+            pass
+        print("\n正在停止应用...")
+        sys.exit(0)
         
     except ImportError as e:
         print(f"导入应用失败: {e}")
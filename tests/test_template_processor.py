@@ -0,0 +1,59 @@
+"""
+模板处理器测试
+"""
+
+import os
+import json
+import tempfile
+import unittest
+
+from docx import Document
+
+from docx_processor.templates.template_processor import TemplateProcessor
+
+
+class TemplateTestCase(unittest.TestCase):
+    """在临时目录中生成模板文档"""
+    
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.template_path = os.path.join(self.tmpdir.name, 'template.docx')
+    
+    def tearDown(self):
+        self.tmpdir.cleanup()
+    
+    def _make_template(self, *paragraphs):
+        doc = Document()
+        for text in paragraphs:
+            doc.add_paragraph(text)
+        doc.save(self.template_path)
+        return TemplateProcessor(self.template_path)
+
+
+class FillTemplateFastTest(TemplateTestCase):
+    """纯文本快速填充路径"""
+    
+    def test_unclosed_braces_before_placeholder(self):
+        """未闭合的 {{ 不能跨段落吞掉后面的占位符"""
+        processor = self._make_template('unclosed {{ here', '{{title}}')
+        
+        self.assertTrue(processor.fill_template({'title': 'Hello'}))
+        self.assertEqual(
+            [p.text for p in processor.document.paragraphs],
+            ['unclosed {{ here', 'Hello']
+        )
+
+
+class TemplateInfoTest(TemplateTestCase):
+    """模板信息"""
+    
+    def test_template_info_is_json_serializable(self):
+        """模板信息中的占位符为字典，可直接JSON序列化"""
+        processor = self._make_template('{{title}}')
+        
+        info = json.loads(json.dumps(processor.get_template_info()))
+        self.assertEqual(info['placeholders']['text_placeholders'][0]['name'], 'title')
+
+
+if __name__ == '__main__':
+    unittest.main()
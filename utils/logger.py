@@ -7,47 +7,73 @@ Centralized logging system with timing and performance monitoring
 import os
 import sys
 import time
+import queue
+import atexit
 import logging
+import logging.handlers
 import functools
+import threading
 from datetime import datetime
 from typing import Dict, Any, Optional, Callable
 from pathlib import Path
 
+# Raw timestamp key -> ISO string key reported by get_performance_summary
+_ISO_TIME_KEYS = (
+    ('start_timestamp', 'start_time'),
+    ('end_timestamp', 'end_time'),
+    ('stage_timestamp', 'timestamp'),
+)
+
 class PerformanceLogger:
     """Performance monitoring and timing logger"""
     
+    __slots__ = ('logger', 'timers', 'stages', '_by_op')
+    
     def __init__(self, logger: logging.Logger):
         self.logger = logger
-        self.timers: Dict[str, float] = {}
+        self.timers: Dict[str, int] = {}  # perf_counter_ns() start values
         self.stages: Dict[str, Dict[str, Any]] = {}
+        # Dotted prefix -> stage keys under it (dict used as an ordered set)
+        self._by_op: Dict[str, Dict[str, None]] = {}
+    
+    def _index_stage(self, stage_key: str):
+        """Register a stage key under itself and each of its dotted prefixes"""
+        prefix = stage_key
+        while True:
+            self._by_op.setdefault(prefix, {})[stage_key] = None
+            dot = prefix.rfind('.')
+            if dot < 0:
+                break
+            prefix = prefix[:dot]
     
     def start_timer(self, operation_id: str, description: str = ""):
         """Start timing an operation"""
-        self.timers[operation_id] = time.time()
+        self.timers[operation_id] = time.perf_counter_ns()
+        # Wall-clock times are stored raw; ISO strings are built in get_performance_summary
         self.stages[operation_id] = {
             'description': description,
-            'start_time': datetime.now().isoformat(),
             'start_timestamp': time.time()
         }
-        self.logger.info(f"⏱️  START: {operation_id} - {description}")
+        self._index_stage(operation_id)
+        self.logger.info("⏱️  START: %s - %s", operation_id, description)
     
     def end_timer(self, operation_id: str, success: bool = True, details: str = ""):
         """End timing an operation and log the duration"""
         if operation_id not in self.timers:
-            self.logger.warning(f"Timer {operation_id} was not started")
+            self.logger.warning("Timer %s was not started", operation_id)
             return
         
-        duration = time.time() - self.timers[operation_id]
+        duration = (time.perf_counter_ns() - self.timers[operation_id]) / 1e9
         status = "✅ SUCCESS" if success else "❌ FAILED"
         
         self.stages[operation_id].update({
-            'end_time': datetime.now().isoformat(),
+            'end_timestamp': time.time(),
             'duration': duration,
             'success': success,
             'details': details
         })
         
-        self.logger.info(f"⏱️  END: {operation_id} - {status} - Duration: {duration:.3f}s {details}")
+        self.logger.info("⏱️  END: %s - %s - Duration: %.3fs %s", operation_id, status, duration, details)
         
         # Remove from active timers
         del self.timers[operation_id]
@@ -57,52 +83,71 @@ class PerformanceLogger:
     def log_stage(self, operation_id: str, stage_name: str, details: str = ""):
         """Log a stage within an operation"""
         if operation_id not in self.stages:
-            self.logger.warning(f"Operation {operation_id} not found for stage logging")
+            self.logger.warning("Operation %s not found for stage logging", operation_id)
             return
         
         stage_key = f"{operation_id}.{stage_name}"
         self.stages[stage_key] = {
             'operation_id': operation_id,
             'stage_name': stage_name,
-            'timestamp': datetime.now().isoformat(),
+            'stage_timestamp': time.time(),
             'details': details
         }
+        self._index_stage(stage_key)
         
-        self.logger.info(f"📋 STAGE: {operation_id} -> {stage_name} - {details}")
+        self.logger.info("📋 STAGE: %s -> %s - %s", operation_id, stage_name, details)
     
     def get_performance_summary(self, operation_id: str) -> Dict[str, Any]:
         """Get performance summary for an operation"""
         summary = {}
         
         # Find all stages for this operation
-        for key, stage_data in self.stages.items():
-            if key.startswith(operation_id):
-                summary[key] = stage_data
+        for key in self._by_op.get(operation_id, ()):
+            summary[key] = self._with_iso_times(self.stages[key])
         
         return summary
+    
+    @staticmethod
+    def _with_iso_times(stage_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Copy stage data, adding ISO strings for the raw timestamps"""
+        data = dict(stage_data)
+        for raw_key, iso_key in _ISO_TIME_KEYS:
+            if raw_key in data:
+                data[iso_key] = datetime.fromtimestamp(data[raw_key]).isoformat()
+        return data
 
 def timing_decorator(operation_name: str, logger: Optional[logging.Logger] = None):
     """Decorator to automatically time function execution"""
     def decorator(func: Callable) -> Callable:
+        log = logger if logger is not None else logging.getLogger(func.__module__)
+        # One PerformanceLogger per thread: timers are keyed by operation id,
+        # so concurrent calls must not share an instance
+        local = threading.local()
+        
         @functools.wraps(func)
         def wrapper(*args, **kwargs):
-            if logger is None:
-                log = logging.getLogger(func.__module__)
-            else:
-                log = logger
+            perf_logger = getattr(local, 'perf_logger', None)
+            if perf_logger is None:
+                perf_logger = local.perf_logger = PerformanceLogger(log)
+                local.depth = 0
             
-            perf_logger = PerformanceLogger(log)
+            # Re-entrant calls on the same thread get their own timer key
+            depth = local.depth
+            operation_id = operation_name if depth == 0 else f"{operation_name}#{depth}"
+            local.depth = depth + 1
             
             # Start timing
-            perf_logger.start_timer(operation_name, f"Executing {func.__name__}")
+            perf_logger.start_timer(operation_id, f"Executing {func.__name__}")
             
             try:
                 result = func(*args, **kwargs)
-                perf_logger.end_timer(operation_name, success=True)
+                perf_logger.end_timer(operation_id, success=True)
                 return result
             except Exception as e:
-                perf_logger.end_timer(operation_name, success=False, details=f"Error: {str(e)}")
+                perf_logger.end_timer(operation_id, success=False, details=f"Error: {str(e)}")
                 raise
+            finally:
+                local.depth = depth
         
         return wrapper
     return decorator
@@ -121,11 +166,67 @@ class ColoredFormatter(logging.Formatter):
     }
     
     def format(self, record):
-        # Add color to level name
-        if record.levelname in self.COLORS:
-            record.levelname = f"{self.COLORS[record.levelname]}{record.levelname}{self.COLORS['RESET']}"
+        # Add color to level name only while formatting: the record is shared
+        # with the other handlers (e.g. the file handler)
+        levelname = record.levelname
+        color = self.COLORS.get(levelname)
+        if color is None:
+            return super().format(record)
         
-        return super().format(record)
+        record.levelname = f"{color}{levelname}{self.COLORS['RESET']}"
+        try:
+            return super().format(record)
+        finally:
+            record.levelname = levelname
+
+# Formatters are stateless, so every logger shares the same instances
+_DETAILED_FMT = logging.Formatter(
+    '%(asctime)s | %(levelname)-8s | %(name)s | %(funcName)s:%(lineno)d | %(message)s',
+    datefmt='%Y-%m-%d %H:%M:%S'
+)
+
+_SIMPLE_FMT = logging.Formatter(
+    '%(asctime)s | %(levelname)-8s | %(message)s',
+    datefmt='%H:%M:%S'
+)
+
+_COLOR_FMT = ColoredFormatter(
+    '%(asctime)s | %(levelname)-8s | %(name)s | %(message)s',
+    datefmt='%H:%M:%S'
+)
+
+# Level name -> logging level, for the log_level strings setup_logger accepts
+_LEVEL_CACHE = {
+    'CRITICAL': logging.CRITICAL,
+    'FATAL': logging.FATAL,
+    'ERROR': logging.ERROR,
+    'WARNING': logging.WARNING,
+    'WARN': logging.WARN,
+    'INFO': logging.INFO,
+    'DEBUG': logging.DEBUG,
+    'NOTSET': logging.NOTSET,
+}
+
+# Logger name -> arguments of its current configuration
+_configured: Dict[str, tuple] = {}
+
+# Logger name -> listener writing its queued records to the log file
+_listeners: Dict[str, logging.handlers.QueueListener] = {}
+
+def _stop_listener(name: str):
+    """Stop a logger's file listener, flushing queued records, and close its handlers"""
+    listener = _listeners.pop(name, None)
+    if listener is None:
+        return
+    listener.stop()
+    for handler in listener.handlers:
+        handler.close()
+
+@atexit.register
+def _stop_all_listeners():
+    """Flush every queued record before interpreter shutdown"""
+    for name in list(_listeners):
+        _stop_listener(name)
 
 def setup_logger(
     name: str = "ai_doc_assistant",
@@ -151,36 +252,33 @@ def setup_logger(
     # Create logger
     logger = logging.getLogger(name)
     
+    # Already configured with the same arguments: nothing to rebuild
+    config = (log_level, log_file, console_output, enable_colors)
+    if _configured.get(name) == config:
+        return logger
+    
     # Clear existing handlers
+    _stop_listener(name)
+    for handler in logger.handlers:
+        handler.close()
     logger.handlers.clear()
     
-    # Set level
-    level = getattr(logging, log_level.upper(), logging.INFO)
-    logger.setLevel(level)
-    
-    # Create formatters
-    detailed_formatter = logging.Formatter(
-        '%(asctime)s | %(levelname)-8s | %(name)s | %(funcName)s:%(lineno)d | %(message)s',
-        datefmt='%Y-%m-%d %H:%M:%S'
-    )
-    
-    simple_formatter = logging.Formatter(
-        '%(asctime)s | %(levelname)-8s | %(message)s',
-        datefmt='%H:%M:%S'
-    )
+    # Set level (the logger is the only level filter; handlers accept everything
+    # it passes). setLevel clears every logger's level cache, so skip no-op calls
+    level = _LEVEL_CACHE.get(log_level.upper(), logging.INFO)
+    if logger.level != level:
+        logger.setLevel(level)
     
     # Console handler
     if console_output:
         console_handler = logging.StreamHandler(sys.stdout)
-        console_handler.setLevel(level)
         
-        if enable_colors:
-            console_handler.setFormatter(ColoredFormatter(
-                '%(asctime)s | %(levelname)-8s | %(name)s | %(message)s',
-                datefmt='%H:%M:%S'
-            ))
+        # Piped output (CI, journald, Docker) gets no escape codes
+        isatty = getattr(sys.stdout, 'isatty', None)
+        if enable_colors and isatty is not None and isatty():
+            console_handler.setFormatter(_COLOR_FMT)
         else:
-            console_handler.setFormatter(simple_formatter)
+            console_handler.setFormatter(_SIMPLE_FMT)
         
         logger.addHandler(console_handler)
     
@@ -188,16 +286,25 @@ def setup_logger(
     if log_file:
         # Ensure log directory exists
         log_path = Path(log_file)
-        log_path.parent.mkdir(parents=True, exist_ok=True)
+        if not log_path.parent.exists():
+            log_path.parent.mkdir(parents=True, exist_ok=True)
         
         file_handler = logging.FileHandler(log_file, encoding='utf-8')
-        file_handler.setLevel(logging.DEBUG)  # Always log everything to file
-        file_handler.setFormatter(detailed_formatter)
-        logger.addHandler(file_handler)
+        file_handler.setFormatter(_DETAILED_FMT)
+        
+        # File writes happen on the listener thread, off the calling thread
+        log_queue = queue.SimpleQueue()
+        listener = logging.handlers.QueueListener(
+            log_queue, file_handler, respect_handler_level=True
+        )
+        listener.start()
+        _listeners[name] = listener
+        logger.addHandler(logging.handlers.QueueHandler(log_queue))
     
     # Prevent propagation to root logger
     logger.propagate = False
     
+    _configured[name] = config
     return logger
 
 def get_logger(name: str = None) -> logging.Logger:
@@ -220,38 +327,40 @@ def get_logger(name: str = None) -> logging.Logger:
 class DocumentProcessingLogger:
     """Specialized logger for document processing operations"""
     
+    __slots__ = ('operation_id', 'logger', 'performance', 'stages')
+    
     def __init__(self, operation_id: str, logger: Optional[logging.Logger] = None):
         self.operation_id = operation_id
-        self.logger = logger or get_logger()
+        self.logger = logger or get_logger(__name__)
         self.performance = PerformanceLogger(self.logger)
         self.stages = []
     
     def log_upload_start(self, filename: str, file_size: int):
         """Log file upload start"""
         self.performance.start_timer(f"{self.operation_id}.upload", f"Uploading {filename}")
-        self.logger.info(f"📤 UPLOAD START: {filename} ({file_size} bytes)")
+        self.logger.info("📤 UPLOAD START: %s (%s bytes)", filename, file_size)
     
     def log_upload_complete(self, success: bool, details: str = ""):
         """Log file upload completion"""
         self.performance.end_timer(f"{self.operation_id}.upload", success, details)
         status = "✅ SUCCESS" if success else "❌ FAILED"
-        self.logger.info(f"📤 UPLOAD COMPLETE: {status} - {details}")
+        self.logger.info("📤 UPLOAD COMPLETE: %s - %s", status, details)
     
     def log_text_extraction_start(self):
         """Log text extraction start"""
         self.performance.start_timer(f"{self.operation_id}.extraction", "Extracting text from document")
-        self.logger.info(f"📄 TEXT EXTRACTION START: Processing document content")
+        self.logger.info("📄 TEXT EXTRACTION START: Processing document content")
     
     def log_text_extraction_complete(self, success: bool, text_length: int = 0):
         """Log text extraction completion"""
         self.performance.end_timer(f"{self.operation_id}.extraction", success)
         status = "✅ SUCCESS" if success else "❌ FAILED"
-        self.logger.info(f"📄 TEXT EXTRACTION COMPLETE: {status} - Extracted {text_length} characters")
+        self.logger.info("📄 TEXT EXTRACTION COMPLETE: %s - Extracted %s characters", status, text_length)
     
     def log_ai_processing_start(self, model: str = "unknown"):
         """Log AI processing start"""
         self.performance.start_timer(f"{self.operation_id}.ai_processing", f"AI processing with {model}")
-        self.logger.info(f"🤖 AI PROCESSING START: Using model {model}")
+        self.logger.info("🤖 AI PROCESSING START: Using model %s", model)
     
     def log_ai_processing_stage(self, stage: str, details: str = ""):
         """Log AI processing stage"""
@@ -261,45 +370,47 @@ class DocumentProcessingLogger:
         """Log AI processing completion"""
         self.performance.end_timer(f"{self.operation_id}.ai_processing", success)
         status = "✅ SUCCESS" if success else "❌ FAILED"
-        self.logger.info(f"🤖 AI PROCESSING COMPLETE: {status} - Generated {response_length} characters using {model}")
+        self.logger.info("🤖 AI PROCESSING COMPLETE: %s - Generated %s characters using %s", status, response_length, model)
     
     def log_validation_start(self):
         """Log data validation start"""
         self.performance.start_timer(f"{self.operation_id}.validation", "Validating AI response data")
-        self.logger.info(f"✅ VALIDATION START: Checking data format and content")
+        self.logger.info("✅ VALIDATION START: Checking data format and content")
     
     def log_validation_complete(self, success: bool, errors: list = None):
         """Log data validation completion"""
         self.performance.end_timer(f"{self.operation_id}.validation", success)
         status = "✅ SUCCESS" if success else "❌ FAILED"
         error_count = len(errors) if errors else 0
-        self.logger.info(f"✅ VALIDATION COMPLETE: {status} - {error_count} errors found")
+        self.logger.info("✅ VALIDATION COMPLETE: %s - %s errors found", status, error_count)
         if errors:
             for error in errors:
-                self.logger.warning(f"⚠️  VALIDATION ERROR: {error}")
+                self.logger.warning("⚠️  VALIDATION ERROR: %s", error)
     
     def log_template_processing_start(self, template_path: str):
         """Log template processing start"""
         self.performance.start_timer(f"{self.operation_id}.template", f"Processing template {template_path}")
-        self.logger.info(f"📝 TEMPLATE PROCESSING START: {template_path}")
+        self.logger.info("📝 TEMPLATE PROCESSING START: %s", template_path)
     
     def log_template_processing_complete(self, success: bool, output_path: str = ""):
         """Log template processing completion"""
         self.performance.end_timer(f"{self.operation_id}.template", success)
         status = "✅ SUCCESS" if success else "❌ FAILED"
-        self.logger.info(f"📝 TEMPLATE PROCESSING COMPLETE: {status} - Output: {output_path}")
+        self.logger.info("📝 TEMPLATE PROCESSING COMPLETE: %s - Output: %s", status, output_path)
     
     def log_generation_complete(self, total_duration: float, success: bool):
         """Log overall generation completion"""
         status = "🎉 SUCCESS" if success else "💥 FAILED"
-        self.logger.info(f"{status} DOCUMENT GENERATION COMPLETE: Total duration {total_duration:.3f}s")
+        self.logger.info("%s DOCUMENT GENERATION COMPLETE: Total duration %.3fs", status, total_duration)
         
-        # Log performance summary
-        self.logger.info(f"📊 PERFORMANCE SUMMARY for {self.operation_id}:")
+        # Log performance summary (skip building it when INFO is filtered out)
+        if not self.logger.isEnabledFor(logging.INFO):
+            return
+        self.logger.info("📊 PERFORMANCE SUMMARY for %s:", self.operation_id)
         summary = self.performance.get_performance_summary(self.operation_id)
         for stage_id, stage_data in summary.items():
             if 'duration' in stage_data:
-                self.logger.info(f"  - {stage_id}: {stage_data['duration']:.3f}s")
+                self.logger.info("  - %s: %.3fs", stage_id, stage_data['duration'])
 
 # Initialize default logger
 default_logger = setup_logger(